@@ -20,7 +20,7 @@ if config.config_file_name is not None:
 # for 'autogenerate' support
 # from myapp import mymodel
 # target_metadata = mymodel.Base.metadata
-from app.db.models import Base
+from app.db.models import Base, UserTransaction
 target_metadata = Base.metadata
 
 # other values from the config, defined by the needs of env.py,
@@ -31,6 +31,25 @@ from app.config import settings
 config.set_main_option("sqlalchemy.url", settings.db_url)
 
 
+# Tables created by migrations only, without models
+MIGRATION_TABLES = {"lebedev_user_balance_backfill"}
+
+
+def include_object(object, name, type_, reflected, compare_to) -> bool:
+    """Skip tables that have no models in autogenerate.
+
+    Monthly partitions of the transactions table are created by
+    migrations and app.db.partitions, MIGRATION_TABLES keep data for
+    downgrades. They would otherwise be detected as removed tables.
+    """
+    if type_ == "table" and reflected and compare_to is None:
+        return not (
+            name.startswith(f"{UserTransaction.__tablename__}_")
+            or name in MIGRATION_TABLES
+        )
+    return True
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -49,6 +68,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -61,6 +81,7 @@ def do_run_migrations(connection: Connection) -> None:
         target_metadata=target_metadata,
         include_schemas=True,
         version_table_schema=target_metadata.schema,
+        include_object=include_object,
         )
 
     with context.begin_transaction():
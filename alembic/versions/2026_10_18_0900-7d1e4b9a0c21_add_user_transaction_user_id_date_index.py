@@ -0,0 +1,43 @@
+"""add user_transaction user_id date index
+
+Revision ID: 7d1e4b9a0c21
+Revises: 2c4f2c146d27
+Create Date: 2026-10-18 09:00:12.402351
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d1e4b9a0c21'
+down_revision: Union[str, None] = '2c4f2c146d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY не может выполняться внутри транзакции
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_lebedev_user_transaction_user_id_date',
+            'lebedev_user_transaction',
+            ['user_id', 'date'],
+            unique=False,
+            schema='lebedev_schema',
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_lebedev_user_transaction_user_id_date',
+            table_name='lebedev_user_transaction',
+            schema='lebedev_schema',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
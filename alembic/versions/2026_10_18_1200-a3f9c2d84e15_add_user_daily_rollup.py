@@ -0,0 +1,45 @@
+"""add user daily rollup
+
+Revision ID: a3f9c2d84e15
+Revises: 7d1e4b9a0c21
+Create Date: 2026-10-18 12:00:41.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f9c2d84e15'
+down_revision: Union[str, None] = '7d1e4b9a0c21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('lebedev_user_daily_rollup',
+    sa.Column('user_id', sa.BigInteger(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('transaction_type_id', sa.BigInteger(), nullable=False),
+    sa.Column('count', sa.BigInteger(), nullable=False),
+    sa.Column('amount', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['transaction_type_id'], ['lebedev_schema.lebedev_transaction_type.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['lebedev_schema.lebedev_user.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'day', 'transaction_type_id'),
+    schema='lebedev_schema'
+    )
+    # Заполнение по уже существующим транзакциям
+    op.execute(
+        'INSERT INTO lebedev_schema.lebedev_user_daily_rollup '
+        '(user_id, day, transaction_type_id, count, amount) '
+        'SELECT user_id, CAST(date AS date), transaction_type_id, '
+        'count(*), sum(amount) '
+        'FROM lebedev_schema.lebedev_user_transaction '
+        'GROUP BY user_id, CAST(date AS date), transaction_type_id'
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('lebedev_user_daily_rollup', schema='lebedev_schema')
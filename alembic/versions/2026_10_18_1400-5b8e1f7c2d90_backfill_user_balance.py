@@ -0,0 +1,83 @@
+"""backfill user balance
+
+Revision ID: 5b8e1f7c2d90
+Revises: a3f9c2d84e15
+Create Date: 2026-10-18 14:00:27.604183
+
+До этой ревизии сервис не обновлял lebedev_user.balance, поэтому баланс
+пользователей с транзакциями пересчитывается по их истории. Меняются
+только строки с балансом 0, который сервис никогда не записывал,
+балансы, заданные вне сервиса, остаются как есть. Прежние значения
+сохраняются в lebedev_user_balance_backfill и возвращаются при
+downgrade.
+
+Порядок выката: перед upgrade все экземпляры предыдущей версии сервиса
+должны быть остановлены, новая версия запускается после upgrade head.
+Предыдущая версия создает транзакции, не меняя баланс, и такие
+транзакции после пересчета в балансе не учтутся. Остановка нужна и
+следующей ревизии c61d0a9e4f37, поэтому обе выполняются в одном окне
+обслуживания.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8e1f7c2d90'
+down_revision: Union[str, None] = 'a3f9c2d84e15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKUP_TABLE = 'lebedev_user_balance_backfill'
+
+
+def upgrade() -> None:
+    # Пока баланс пересчитывается, транзакции не создаются
+    op.execute(
+        'LOCK TABLE lebedev_schema.lebedev_user_transaction IN SHARE MODE'
+    )
+    op.create_table(
+        BACKUP_TABLE,
+        sa.Column('user_id', sa.BigInteger(), nullable=False),
+        sa.Column('balance', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('user_id'),
+        schema='lebedev_schema',
+    )
+    op.execute(
+        f'INSERT INTO lebedev_schema.{BACKUP_TABLE} (user_id, balance) '
+        'SELECT u.id, u.balance '
+        'FROM lebedev_schema.lebedev_user AS u '
+        'WHERE u.balance = 0 AND EXISTS ('
+        'SELECT 1 FROM lebedev_schema.lebedev_user_transaction AS ut '
+        'WHERE ut.user_id = u.id'
+        ')'
+    )
+    op.execute(
+        'UPDATE lebedev_schema.lebedev_user AS u '
+        'SET balance = t.balance '
+        'FROM ('
+        'SELECT ut.user_id, '
+        "sum(CASE WHEN tt.name = 'Снятие' "
+        'THEN -ut.amount ELSE ut.amount END) AS balance '
+        'FROM lebedev_schema.lebedev_user_transaction AS ut '
+        'JOIN lebedev_schema.lebedev_transaction_type AS tt '
+        'ON tt.id = ut.transaction_type_id '
+        'GROUP BY ut.user_id'
+        ') AS t '
+        f'JOIN lebedev_schema.{BACKUP_TABLE} AS backup '
+        'ON backup.user_id = t.user_id '
+        'WHERE u.id = t.user_id'
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        'UPDATE lebedev_schema.lebedev_user AS u '
+        'SET balance = backup.balance '
+        f'FROM lebedev_schema.{BACKUP_TABLE} AS backup '
+        'WHERE u.id = backup.user_id'
+    )
+    op.drop_table(BACKUP_TABLE, schema='lebedev_schema')
@@ -0,0 +1,185 @@
+"""partition user_transaction by month
+
+Revision ID: c61d0a9e4f37
+Revises: 5b8e1f7c2d90
+Create Date: 2026-10-18 16:00:41.118204
+
+Требует окна обслуживания. Таблица транзакций переименовывается и
+копируется в секционированную одним INSERT ... SELECT в транзакции
+миграции, поэтому ACCESS EXCLUSIVE блокировка старой таблицы держится
+до конца копирования, и все чтения и записи транзакций ждут его.
+Копирование в несколько транзакций не помогло бы: пока копия не
+закончена, новые транзакции писались бы в таблицу, которая уже
+копируется. Время копирования стоит оценить заранее на копии боевой
+базы.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c61d0a9e4f37'
+down_revision: Union[str, None] = '5b8e1f7c2d90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Сколько месяцев после текущего создается заранее, дальше секции
+# создает задача обслуживания app.db.partitions. Значение зафиксировано
+# в миграции, а не взято из settings.transaction_partitions_ahead, чтобы
+# миграция создавала одинаковые секции при любых настройках окружения
+MONTHS_AHEAD = 3
+FOREIGN_KEY_COLUMNS = ('user_id', 'transaction_type_id')
+
+
+def rename_table(name: str, new_name: str) -> None:
+    # Имена ключей и индекса заняты до удаления старой таблицы
+    op.execute(
+        f'ALTER TABLE lebedev_schema.{name} RENAME TO {new_name}'
+    )
+    op.execute(
+        f'ALTER TABLE lebedev_schema.{new_name} '
+        f'RENAME CONSTRAINT {name}_pkey TO {new_name}_pkey'
+    )
+    for column in FOREIGN_KEY_COLUMNS:
+        op.execute(
+            f'ALTER TABLE lebedev_schema.{new_name} '
+            f'RENAME CONSTRAINT {name}_{column}_fkey '
+            f'TO {new_name}_{column}_fkey'
+        )
+    op.execute(
+        f'ALTER INDEX lebedev_schema.ix_{name}_user_id_date '
+        f'RENAME TO ix_{new_name}_user_id_date'
+    )
+
+
+def copy_transactions(source: str) -> None:
+    op.execute(
+        'INSERT INTO lebedev_schema.lebedev_user_transaction '
+        '(id, user_id, amount, transaction_type_id, date) '
+        'SELECT id, user_id, amount, transaction_type_id, date '
+        f'FROM lebedev_schema.{source}'
+    )
+    op.execute(
+        'ALTER SEQUENCE lebedev_schema.lebedev_user_transaction_id_seq '
+        'OWNED BY lebedev_schema.lebedev_user_transaction.id'
+    )
+    op.drop_table(source, schema='lebedev_schema')
+    op.create_index(
+        'ix_lebedev_user_transaction_user_id_date',
+        'lebedev_user_transaction',
+        ['user_id', 'date'],
+        unique=False,
+        schema='lebedev_schema',
+    )
+
+
+def create_transactions_table(**table_kwargs) -> None:
+    op.create_table(
+        'lebedev_user_transaction',
+        sa.Column(
+            'id',
+            sa.BigInteger(),
+            server_default=sa.text(
+                "nextval('lebedev_schema.lebedev_user_transaction_id_seq')"
+            ),
+            nullable=False,
+        ),
+        sa.Column('user_id', sa.BigInteger(), nullable=False),
+        sa.Column('amount', sa.BigInteger(), nullable=False),
+        sa.Column('transaction_type_id', sa.BigInteger(), nullable=False),
+        sa.Column('date', sa.DateTime(), nullable=False),
+        # У секций остаются внешние ключи со старыми именами, поэтому
+        # имена задаются явно, иначе Postgres выберет имена с суффиксом
+        sa.ForeignKeyConstraint(
+            ['transaction_type_id'],
+            ['lebedev_schema.lebedev_transaction_type.id'],
+            name='lebedev_user_transaction_transaction_type_id_fkey',
+        ),
+        sa.ForeignKeyConstraint(
+            ['user_id'],
+            ['lebedev_schema.lebedev_user.id'],
+            name='lebedev_user_transaction_user_id_fkey',
+        ),
+        schema='lebedev_schema',
+        **table_kwargs,
+    )
+
+
+def upgrade() -> None:
+    # Секционированная таблица не может иметь уникального ключа только по
+    # id, поэтому внешний ключ из связей отчетов на транзакции удаляется
+    op.drop_constraint(
+        'lebedev_transaction_report_relation_transaction_id_fkey',
+        'lebedev_transaction_report_relation',
+        schema='lebedev_schema',
+        type_='foreignkey',
+    )
+    rename_table(
+        'lebedev_user_transaction',
+        'lebedev_user_transaction_unpartitioned',
+    )
+    create_transactions_table(postgresql_partition_by='RANGE (date)')
+    op.create_primary_key(
+        'lebedev_user_transaction_pkey',
+        'lebedev_user_transaction',
+        ['id', 'date'],
+        schema='lebedev_schema',
+    )
+    op.execute(
+        'CREATE TABLE lebedev_schema.lebedev_user_transaction_default '
+        'PARTITION OF lebedev_schema.lebedev_user_transaction DEFAULT'
+    )
+    # Секции за каждый месяц истории и MONTHS_AHEAD месяцев вперед
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+            month date;
+            last_month date := date_trunc('month', now())
+                + interval '{MONTHS_AHEAD} months';
+        BEGIN
+            SELECT date_trunc('month', coalesce(min(date), now()))
+            INTO month
+            FROM lebedev_schema.lebedev_user_transaction_unpartitioned;
+            WHILE month <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE lebedev_schema.%I '
+                    'PARTITION OF lebedev_schema.lebedev_user_transaction '
+                    'FOR VALUES FROM (%L) TO (%L)',
+                    'lebedev_user_transaction_p' || to_char(month, 'YYYY_MM'),
+                    month,
+                    month + interval '1 month'
+                );
+                month := month + interval '1 month';
+            END LOOP;
+        END $$
+        """
+    )
+    copy_transactions('lebedev_user_transaction_unpartitioned')
+
+
+def downgrade() -> None:
+    rename_table(
+        'lebedev_user_transaction',
+        'lebedev_user_transaction_partitioned',
+    )
+    create_transactions_table()
+    op.create_primary_key(
+        'lebedev_user_transaction_pkey',
+        'lebedev_user_transaction',
+        ['id'],
+        schema='lebedev_schema',
+    )
+    copy_transactions('lebedev_user_transaction_partitioned')
+    op.create_foreign_key(
+        'lebedev_transaction_report_relation_transaction_id_fkey',
+        'lebedev_transaction_report_relation',
+        'lebedev_user_transaction',
+        ['transaction_id'],
+        ['id'],
+        source_schema='lebedev_schema',
+        referent_schema='lebedev_schema',
+    )
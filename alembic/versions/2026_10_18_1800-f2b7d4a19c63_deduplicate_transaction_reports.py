@@ -0,0 +1,98 @@
+"""deduplicate transaction reports
+
+Revision ID: f2b7d4a19c63
+Revises: c61d0a9e4f37
+Create Date: 2026-10-18 18:00:09.531877
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b7d4a19c63'
+down_revision: Union[str, None] = 'c61d0a9e4f37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Для каждого пользователя и периода остается отчет с наименьшим id,
+    # связи повторных отчетов переносятся на него
+    op.execute(
+        """
+        CREATE TEMPORARY TABLE report_duplicate ON COMMIT DROP AS
+        SELECT id, kept_id
+        FROM (
+            SELECT
+                id,
+                min(id) OVER (
+                    PARTITION BY user_id, date_start, date_end
+                ) AS kept_id
+            FROM lebedev_schema.lebedev_transaction_report
+        ) AS report
+        WHERE id <> kept_id
+        """
+    )
+    op.execute(
+        """
+        UPDATE lebedev_schema.lebedev_transaction_report_relation AS relation
+        SET report_id = duplicate.kept_id
+        FROM report_duplicate AS duplicate
+        WHERE relation.report_id = duplicate.id
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM lebedev_schema.lebedev_transaction_report AS report
+        USING report_duplicate AS duplicate
+        WHERE report.id = duplicate.id
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM lebedev_schema.lebedev_transaction_report_relation
+        WHERE id IN (
+            SELECT id
+            FROM (
+                SELECT
+                    id,
+                    row_number() OVER (
+                        PARTITION BY report_id, transaction_id ORDER BY id
+                    ) AS number
+                FROM lebedev_schema.lebedev_transaction_report_relation
+            ) AS relation
+            WHERE number > 1
+        )
+        """
+    )
+    op.create_unique_constraint(
+        'uq_lebedev_transaction_report_user_id_period',
+        'lebedev_transaction_report',
+        ['user_id', 'date_start', 'date_end'],
+        schema='lebedev_schema',
+    )
+    op.create_unique_constraint(
+        'uq_lebedev_transaction_report_relation_report_transaction',
+        'lebedev_transaction_report_relation',
+        ['report_id', 'transaction_id'],
+        schema='lebedev_schema',
+    )
+
+
+def downgrade() -> None:
+    # Удаленные повторные отчеты не восстанавливаются
+    op.drop_constraint(
+        'uq_lebedev_transaction_report_relation_report_transaction',
+        'lebedev_transaction_report_relation',
+        schema='lebedev_schema',
+        type_='unique',
+    )
+    op.drop_constraint(
+        'uq_lebedev_transaction_report_user_id_period',
+        'lebedev_transaction_report',
+        schema='lebedev_schema',
+        type_='unique',
+    )
@@ -6,6 +6,12 @@ class Settings(BaseSettings):
 
     # Общие настройки
     service_name: str = 'transaction-service'
+    transactions_batch_max_size: int = 10000
+
+    # Настройки группового commit при создании транзакций
+    transaction_group_commit: bool = False
+    transaction_group_commit_max_rows: int = 500
+    transaction_group_commit_interval: float = 0.005
 
     # Настройки db
     db_user: str = 'postgres'
@@ -15,19 +21,54 @@ class Settings(BaseSettings):
     db_name: str = 'credit_card'
     db_echo: bool = False
     db_schema: str = 'lebedev_schema'
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = -1
+    db_pool_pre_ping: bool = False
+    # Кеши подготовленных выражений asyncpg, за PgBouncer в режиме
+    # транзакций оба должны быть равны 0
+    db_statement_cache_size: int = 100
+    db_prepared_statement_cache_size: int = 100
+    transaction_partitions_ahead: int = 3
+
+    # Настройки реплик db
+    db_replica_urls: list[str] = []
+    db_replica_max_lag: float = 1.0
+    db_replica_check_interval: float = 1.0
+    db_replica_check_timeout: float = 0.5
 
     # Настройки Redis
     redis_host: str = 'redis'
     redis_port: int = 6379
     redis_db_number: int = 1
+    redis_max_connections: int = 50
+    redis_pool_timeout: int = 1
+    redis_socket_timeout: float = 1.0
+    redis_socket_connect_timeout: float = 1.0
+
+    # Настройки кеша отчетов
+    report_cache_ttl: int = 3600
+    report_cache_max_size: int | None = None
+    report_lock_ttl_ms: int = 5000
+    report_lock_wait: float = 2.0
+    report_lock_poll_interval: float = 0.05
+
+    # Настройки потоковой выдачи отчетов
+    report_stream_chunk_size: int = 1000
+
+    # Настройки постраничной выдачи отчетов
+    report_page_max_size: int = 1000
 
     # Настройки Jaeger
+    jaeger_enabled: bool = True
     jaeger_agent_host: str = 'jaeger'
     jaeger_agent_port: str = '6831'
     jaeger_sampler_type: str = 'probabilistic'
     jaeger_sampler_param: float = 1.0
     jaeger_logging: bool = True
     jaeger_validate: bool = True
+    jaeger_max_tag_length: int = 1024
 
     @property
     def db_url(self) -> str:
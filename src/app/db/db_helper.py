@@ -1,45 +1,214 @@
-from asyncio import current_task
+import asyncio
+from collections.abc import Awaitable, Callable, Sequence
+from itertools import count
+from time import perf_counter
 from typing import AsyncGenerator
 
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_scoped_session,
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
 
 from app.config import settings
+from app.metrics import (
+    CallbackGauge,
+    db_pool_timeouts,
+    db_pool_wait,
+    db_read_sessions,
+    metrics_registry,
+)
+
+# Отставание реплики в секундах, реплика без непримененного WAL не отстает
+REPLICA_LAG_QUERY = text(' '.join([
+    'SELECT CASE',
+    'WHEN NOT pg_is_in_recovery() THEN 0',
+    'WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0',
+    'ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())',
+    'END',
+]))
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Пул соединений с замером времени получения соединения.
+
+    В замер входит ожидание свободного соединения и открытие нового
+    соединения сверх размера пула. Неудачные попытки не замеряются,
+    попытки, не дождавшиеся соединения за `db_pool_timeout`, считаются
+    отдельно.
+    """
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        started = perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            db_pool_timeouts.inc()
+            raise
+        db_pool_wait.observe(perf_counter() - started)
+        return connection
+
+
+def make_engine(url: str, echo: bool) -> AsyncEngine:
+    """Создание движка БД с настройками пула из `settings`."""
+    return create_async_engine(
+        url=url,
+        echo=echo,
+        poolclass=TimedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args={
+            'statement_cache_size': settings.db_statement_cache_size,
+            'prepared_statement_cache_size': (
+                settings.db_prepared_statement_cache_size
+            ),
+        },
+    )
+
+
+def make_session_factory(
+    engine: AsyncEngine,
+) -> async_sessionmaker[AsyncSession]:
+    """Создание фабрики сессий движка."""
+    return async_sessionmaker(
+        bind=engine,
+        autoflush=False,
+        autocommit=False,
+        expire_on_commit=False,
+    )
+
+
+class Replica:
+    """Реплика БД с кешированной проверкой доступности и отставания."""
+
+    def __init__(self, url: str, echo: bool = False) -> None:
+        self.engine = make_engine(url, echo)
+        self.session_factory = make_session_factory(self.engine)
+        self.available = False
+        self.checked_at = float('-inf')
+
+    async def is_available(self) -> bool:
+        """Доступна ли реплика для чтения.
+
+        Проверка выполняется не чаще раза в `db_replica_check_interval`
+        секунд, между проверками возвращается ее прошлый результат.
+        """
+        now = asyncio.get_running_loop().time()
+        if now - self.checked_at >= settings.db_replica_check_interval:
+            self.checked_at = now
+            self.available = await self.check_lag()
+        return self.available
+
+    async def check_lag(self) -> bool:
+        """Реплика отвечает и отстает не больше `db_replica_max_lag`."""
+        try:
+            lag = await asyncio.wait_for(
+                self.get_lag(),
+                settings.db_replica_check_timeout,
+            )
+        except (OSError, SQLAlchemyError, asyncio.TimeoutError):
+            return False
+        return lag is not None and lag <= settings.db_replica_max_lag
 
+    async def get_lag(self) -> float | None:
+        """Отставание реплики в секундах."""
+        async with self.engine.connect() as conn:
+            return await conn.scalar(REPLICA_LAG_QUERY)
 
-class DatabaseHelper:
-    """Подключение к базе данных."""
+
+class DatabaseHelper:  # noqa: WPS214
+    """Подключение к базе данных и ее репликам."""
 
     def __init__(
         self,
         url: str,
         echo: bool = False,
+        replica_urls: Sequence[str] = (),
     ) -> None:
-        self.engine = create_async_engine(
-            url=url,
-            echo=echo,
-            pool_size=10,
-            max_overflow=20,  # noqa: WPS432
-        )
-        self.session_factory = async_sessionmaker(
-            bind=self.engine,
-            autoflush=False,
-            autocommit=False,
-            expire_on_commit=False,
-        )
+        self.engine = make_engine(url, echo)
+        self.session_factory = make_session_factory(self.engine)
+        self.replicas = [
+            Replica(replica_url, echo) for replica_url in replica_urls
+        ]
+        self.replica_turns = count()
+
+    def pool_stats(self) -> dict[str, float]:
+        """Состояние пула соединений."""
+        pool = self.engine.pool
+        if not isinstance(pool, AsyncAdaptedQueuePool):
+            return {}
+        return {
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': pool.overflow(),
+        }
 
     def get_scoped_session(self) -> async_scoped_session[AsyncSession]:
         """Получение сессии."""
         session = async_scoped_session(
             session_factory=self.session_factory,
-            scopefunc=current_task,
+            scopefunc=asyncio.current_task,
         )
         return session
 
+    def session_factory_dependency(self) -> async_sessionmaker[AsyncSession]:
+        """Зависимость для получения фабрики сессий.
+
+        Нужна ответам, которые продолжают работать с БД после выхода из
+        обработчика, например потоковым.
+        """
+        return self.session_factory
+
+    async def read_session_factory(self) -> async_sessionmaker[AsyncSession]:
+        """Фабрика сессий для чтения.
+
+        Реплики перебираются по кругу, если ни одна не доступна,
+        используется основная БД.
+        """
+        turn = next(self.replica_turns) % max(len(self.replicas), 1)
+        for replica in self.replicas[turn:] + self.replicas[:turn]:
+            if await replica.is_available():
+                db_read_sessions.labels('replica').inc()
+                return replica.session_factory
+        db_read_sessions.labels('primary').inc()
+        return self.session_factory
+
+    async def replica_session_factory(
+        self,
+    ) -> async_sessionmaker[AsyncSession] | None:
+        """Фабрика сессий доступной реплики.
+
+        Данные реплики могут отставать от основной БД на
+        `db_replica_max_lag` секунд. Если доступной реплики нет,
+        возвращается `None`, и запрос читает через свою сессию основной
+        БД, не занимая второе соединение из пула.
+        """
+        session_factory = await self.read_session_factory()
+        if session_factory is self.session_factory:
+            return None
+        return session_factory
+
+    def replica_factory_dependency(
+        self,
+    ) -> Callable[[], Awaitable[async_sessionmaker[AsyncSession] | None]]:
+        """Зависимость для выбора реплики при первом чтении.
+
+        Реплика выбирается, только когда запросу действительно нужно
+        прочитать данные, а не при каждом запросе, например
+        обслуженном из кеша.
+        """
+        return self.replica_session_factory
+
     async def scoped_session_dependency(
         self,
     ) -> AsyncGenerator[async_scoped_session[AsyncSession], None]:
@@ -52,4 +221,13 @@ class DatabaseHelper:
 db_helper = DatabaseHelper(
     url=settings.db_url,
     echo=settings.db_echo,
+    replica_urls=settings.db_replica_urls,
+)
+metrics_registry.register(
+    CallbackGauge(
+        'db_pool_connections',
+        'Соединения пула БД по состоянию.',
+        'state',
+        db_helper.pool_stats,
+    ),
 )
@@ -1,6 +1,14 @@
-from datetime import datetime
-
-from sqlalchemy import ForeignKey, MetaData, String
+from datetime import date, datetime
+
+from sqlalchemy import (
+    DDL,
+    ForeignKey,
+    Index,
+    MetaData,
+    String,
+    UniqueConstraint,
+    event,
+)
 from sqlalchemy.orm import (
     Mapped,
     declarative_base,
@@ -49,10 +57,28 @@ class TransactionType(BaseTable):
 
 
 class UserTransaction(BaseTable):
-    """Модель транзакции пользователя."""
+    """Модель транзакции пользователя.
+
+    Таблица секционирована по месяцам `date`, поэтому `date` входит в
+    первичный ключ. Строки вне созданных секций попадают в секцию
+    по умолчанию.
+    """
 
     __tablename__ = 'lebedev_user_transaction'
+    __table_args__ = (
+        Index(
+            'ix_lebedev_user_transaction_user_id_date',
+            'user_id',
+            'date',
+        ),
+        {'postgresql_partition_by': 'RANGE (date)'},
+    )
 
+    id: Mapped[int] = mapped_column(
+        BigInteger,
+        primary_key=True,
+        autoincrement=True,
+    )
     user_id: Mapped[int] = mapped_column(
         BigInteger,
         ForeignKey(f'{schema}.lebedev_user.id'),
@@ -62,13 +88,35 @@ class UserTransaction(BaseTable):
         BigInteger,
         ForeignKey(f'{schema}.{TransactionType.__tablename__}.id'),
     )
-    date: Mapped[datetime]
+    date: Mapped[datetime] = mapped_column(primary_key=True)
+
+
+transactions_table = f'{schema}.{UserTransaction.__tablename__}'
+event.listen(
+    UserTransaction.__table__,
+    'after_create',
+    DDL(' '.join([
+        f'CREATE TABLE {transactions_table}_default',
+        f'PARTITION OF {transactions_table} DEFAULT',
+    ])),
+)
 
 
 class TransactionReport(BaseTable):
-    """Модель отчета о транзакциях."""
+    """Модель отчета о транзакциях.
+
+    Одинаковые отчеты пользователя за один период хранятся одной строкой.
+    """
 
     __tablename__ = 'lebedev_transaction_report'
+    __table_args__ = (
+        UniqueConstraint(
+            'user_id',
+            'date_start',
+            'date_end',
+            name='uq_lebedev_transaction_report_user_id_period',
+        ),
+    )
 
     user_id: Mapped[int] = mapped_column(
         BigInteger,
@@ -79,19 +127,49 @@ class TransactionReport(BaseTable):
 
     transactions: Mapped[list[UserTransaction]] = relationship(
         secondary=f'{schema}.lebedev_transaction_report_relation',
+        primaryjoin='TransactionReport.id == ReportTransactionRelation.report_id',  # noqa: E501
+        secondaryjoin='UserTransaction.id == foreign(ReportTransactionRelation.transaction_id)',  # noqa: E501
     )
 
 
 class ReportTransactionRelation(BaseTable):
-    """Модель связи отчета и транзакции."""
+    """Модель связи отчета и транзакции.
+
+    Внешнего ключа на транзакцию нет: секционированная таблица не может
+    иметь уникального ключа только по `id`.
+    """
 
     __tablename__ = 'lebedev_transaction_report_relation'
+    __table_args__ = (
+        UniqueConstraint(
+            'report_id',
+            'transaction_id',
+            name='uq_lebedev_transaction_report_relation_report_transaction',
+        ),
+    )
 
     report_id: Mapped[int] = mapped_column(
         BigInteger,
         ForeignKey(f'{schema}.{TransactionReport.__tablename__}.id'),
     )
-    transaction_id: Mapped[int] = mapped_column(
+    transaction_id: Mapped[int] = mapped_column(BigInteger)
+
+
+class UserDailyRollup(Base):  # type: ignore
+    """Модель суммы транзакций пользователя за день по типу транзакции."""
+
+    __tablename__ = 'lebedev_user_daily_rollup'
+
+    user_id: Mapped[int] = mapped_column(
         BigInteger,
-        ForeignKey(f'{schema}.{UserTransaction.__tablename__}.id'),
+        ForeignKey(User.id),
+        primary_key=True,
     )
+    day: Mapped[date] = mapped_column(primary_key=True)
+    transaction_type_id: Mapped[int] = mapped_column(
+        BigInteger,
+        ForeignKey(TransactionType.id),
+        primary_key=True,
+    )
+    count: Mapped[int] = mapped_column(BigInteger)
+    amount: Mapped[int] = mapped_column(BigInteger)
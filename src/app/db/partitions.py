@@ -0,0 +1,111 @@
+import asyncio
+from datetime import date
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.config import settings
+from app.db.db_helper import db_helper
+from app.db.models import UserTransaction
+
+MONTHS_IN_YEAR = 12
+
+
+def add_months(month: date, months: int) -> date:
+    """Первое число месяца, отстоящего от month на months месяцев."""
+    month_index = month.year * MONTHS_IN_YEAR + month.month - 1 + months
+    return date(
+        month_index // MONTHS_IN_YEAR,
+        month_index % MONTHS_IN_YEAR + 1,
+        1,
+    )
+
+
+def upcoming_months(today: date, months_ahead: int) -> list[date]:
+    """Текущий месяц и months_ahead следующих."""
+    current_month = today.replace(day=1)
+    return [
+        add_months(current_month, offset)
+        for offset in range(months_ahead + 1)
+    ]
+
+
+def partition_name(month: date) -> str:
+    """Имя секции транзакций за месяц."""
+    return f'{UserTransaction.__tablename__}_p{month:%Y_%m}'
+
+
+def qualified_name(name: str) -> str:
+    """Имя таблицы вместе со схемой."""
+    return f'{settings.db_schema}.{name}'
+
+
+def attach_partition_statements(month: date) -> list[str]:
+    """Создание секции за месяц с переносом ее строк из секции по умолчанию.
+
+    Пока в секции по умолчанию есть строки из диапазона новой секции,
+    Postgres не даст ее добавить, поэтому строки сначала переносятся.
+    """
+    table = qualified_name(UserTransaction.__tablename__)
+    partition = qualified_name(partition_name(month))
+    next_month = add_months(month, 1)
+    move_rows = ' '.join([
+        f'WITH moved AS (DELETE FROM {table}_default',  # noqa: S608
+        f"WHERE date >= '{month}' AND date < '{next_month}' RETURNING *)",
+        f'INSERT INTO {partition} SELECT * FROM moved',  # noqa: S608
+    ])
+    attach = ' '.join([
+        f'ALTER TABLE {table} ATTACH PARTITION {partition}',
+        f"FOR VALUES FROM ('{month}') TO ('{next_month}')",
+    ])
+    return [
+        f'CREATE TABLE {partition} (LIKE {table} INCLUDING ALL)',
+        move_rows,
+        attach,
+    ]
+
+
+async def create_partition(conn: AsyncConnection, month: date) -> bool:
+    """Создание секции за месяц, если ее еще нет."""
+    exists = await conn.scalar(
+        text('SELECT to_regclass(:partition)'),
+        {'partition': qualified_name(partition_name(month))},
+    )
+    if exists is not None:
+        return False
+    for statement in attach_partition_statements(month):
+        await conn.execute(text(statement))
+    return True
+
+
+async def create_upcoming_partitions(
+    engine: AsyncEngine,
+    today: date,
+    months_ahead: int,
+) -> list[str]:
+    """Заблаговременное создание секций транзакций.
+
+    Каждая секция создается в своей транзакции, возвращаются имена
+    созданных секций.
+    """
+    created = []
+    for month in upcoming_months(today, months_ahead):
+        async with engine.begin() as conn:
+            if await create_partition(conn, month):
+                created.append(partition_name(month))
+    return created
+
+
+async def main() -> None:
+    """Запуск обслуживания секций."""
+    created = await create_upcoming_partitions(
+        db_helper.engine,
+        date.today(),
+        settings.transaction_partitions_ahead,
+    )
+    await db_helper.engine.dispose()
+    print(f'Created partitions: {created}')  # noqa: WPS421
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -1,8 +1,19 @@
+import inspect
+from collections.abc import Awaitable, Callable
+from functools import wraps
+from typing import ParamSpec, TypeVar
+
+from jaeger_client import Span as JaegerSpan
 from jaeger_client.config import Config
-from opentracing import Tracer
+from opentracing import Span, Tracer, global_tracer
+from opentracing.scope_managers.contextvars import ContextVarsScopeManager
 
 from app.config import settings
 
+Params = ParamSpec('Params')
+Result = TypeVar('Result')
+AsyncFunction = Callable[Params, Awaitable[Result]]
+
 
 def initialize_jaeger_tracer() -> Tracer:
     """Инициализация Jaeger."""
@@ -20,9 +31,82 @@ def initialize_jaeger_tracer() -> Tracer:
         },
         service_name=settings.service_name,
         validate=settings.jaeger_validate,
+        # Активный span хранится отдельно для каждой задачи asyncio
+        scope_manager=ContextVarsScopeManager(),
     )
     tracer = config.initialize_tracer()
     if tracer is None:
         raise RuntimeError('Jaeger tracer is not initialized')
 
     return tracer
+
+
+def is_span_sampled(span: Span) -> bool:
+    """Попадет ли span в Jaeger.
+
+    Span трассировщика-заглушки никуда не отправляется и считается
+    невыбранным, span других трассировщиков - выбранным.
+    """
+    if isinstance(span, JaegerSpan):
+        return span.is_sampled()
+    return type(span) is not Span  # noqa: WPS516
+
+
+def set_bounded_tag(span: Span, key: str, value: object) -> None:
+    """Запись тега, обрезанного до `jaeger_max_tag_length` символов.
+
+    Значение приводится к строке только для выбранного span, числа
+    записываются как есть.
+    """
+    if not is_span_sampled(span):
+        return
+    if isinstance(value, (int, float)):
+        span.set_tag(key, value)
+        return
+    tag = str(value)
+    max_length = settings.jaeger_max_tag_length
+    if len(tag) > max_length:
+        truncated = tag[:max_length]
+        tag = f'{truncated}...'
+    span.set_tag(key, tag)
+
+
+def tag_active_span(key: str, value: object) -> None:
+    """Запись тега в активный span, если он выбран."""
+    span = global_tracer().active_span
+    if span is not None:
+        set_bounded_tag(span, key, value)
+
+
+def traced(
+    *tag_names: str,
+) -> Callable[[AsyncFunction[Params, Result]], AsyncFunction[Params, Result]]:
+    """Декоратор, выполняющий корутину внутри span с ее именем.
+
+    Аргументы с именами из `tag_names` записываются в теги span. Span
+    создается только внутри выбранной трассировки, при выключенном
+    `jaeger_enabled` функция возвращается без обертки.
+    """
+    def decorator(
+        func: AsyncFunction[Params, Result],
+    ) -> AsyncFunction[Params, Result]:
+        if not settings.jaeger_enabled:
+            return func
+        signature = inspect.signature(func)
+
+        @wraps(func)
+        async def wrapper(
+            *args: Params.args,
+            **kwargs: Params.kwargs,
+        ) -> Result:
+            tracer = global_tracer()
+            parent = tracer.active_span
+            if parent is None or not is_span_sampled(parent):
+                return await func(*args, **kwargs)
+            with tracer.start_active_span(func.__name__) as scope:
+                arguments = signature.bind(*args, **kwargs).arguments
+                for tag_name in tag_names:
+                    set_bounded_tag(scope.span, tag_name, arguments[tag_name])
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -1,44 +1,180 @@
-import redis
+import asyncio
+import secrets
+from datetime import timedelta
+
+from redis.asyncio import BlockingConnectionPool, Redis
+
 from app.config import settings
+from app.metrics import cache_requests, report_cache_skipped, report_lock_waits
 
+# Удаление ключа, только если в нем лежит переданное значение
+DELETE_IF_EQUAL_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
 
-class BaseRedisClient:
-    """Базовый класс для работы с Redis."""
 
-    def __init__(self, host, port, db_number) -> None:
-        self.client = redis.Redis(host=host, port=port, db=db_number)
+def cache_result(cached_value) -> str:
+    """Метка результата обращения к кешу."""
+    return 'miss' if cached_value is None else 'hit'
 
-    def close(self):
-        """Закрытие соединения с Redis."""
-        self.client.close()
 
-    def set(self, key, value):
-        """Установка значения по ключу."""
-        self.client.set(key, value)
+class BaseRedisClient:  # noqa: WPS214
+    """Базовый класс для работы с Redis."""
 
-    def get(self, key):
+    def __init__(self, host, port, db_number) -> None:
+        self.pool = BlockingConnectionPool(
+            host=host,
+            port=port,
+            db=db_number,
+            max_connections=settings.redis_max_connections,
+            timeout=settings.redis_pool_timeout,
+            socket_timeout=settings.redis_socket_timeout,
+            socket_connect_timeout=settings.redis_socket_connect_timeout,
+        )
+        self.client = Redis(connection_pool=self.pool)
+
+    async def close(self):
+        """Закрытие соединений с Redis."""
+        await self.client.aclose()
+        await self.pool.disconnect()
+
+    async def set(self, key, value, ttl: float | None = None):
+        """Установка значения по ключу со временем жизни в секундах."""
+        await self.client.set(
+            key,
+            value,
+            px=None if ttl is None else timedelta(seconds=ttl),
+        )
+
+    async def set_nx(self, key, value, ttl_ms: int) -> bool:
+        """Установка значения, если ключа нет, со временем жизни в мс."""
+        return bool(await self.client.set(key, value, nx=True, px=ttl_ms))
+
+    async def delete(self, key) -> None:
+        """Удаление значения по ключу."""
+        await self.client.delete(key)
+
+    async def delete_if_equal(self, key, value) -> bool:
+        """Атомарное удаление ключа, если в нем лежит значение `value`."""
+        deleted = await self.client.eval(  # type: ignore
+            DELETE_IF_EQUAL_SCRIPT, 1, key, value,
+        )
+        return bool(deleted)
+
+    async def get(self, key):
         """Получение значения по ключу."""
-        return self.client.get(key)
+        return await self.client.get(key)
+
+    async def get_many(self, *keys) -> list:
+        """Получение значений нескольких ключей за одно обращение."""
+        return await self.client.mget(keys)
+
+    async def incr(self, key) -> int:
+        """Атомарное увеличение значения по ключу."""
+        return await self.client.incr(key)
 
 
-class RedisClient(BaseRedisClient):
+class RedisClient(BaseRedisClient):  # noqa: WPS214
     """Класс для работы с Redis."""
 
-    def get_transaciton_type_id(self, type_name: str):
+    async def get_transaciton_type_id(self, type_name: str):
         """Получение id типа транзакции."""
-        return self.get(f'tt_id:{type_name}')
+        type_id = await self.get(f'tt_id:{type_name}')
+        cache_requests.labels('tt_id', cache_result(type_id)).inc()
+        return type_id
 
-    def set_transaciton_type_id(self, type_name: str, type_id: int):
+    async def set_transaciton_type_id(self, type_name: str, type_id: int):
         """Установка id типа транзакции."""
-        self.set(f'tt_id:{type_name}', type_id)
-
-    def get_report_transaction(self, report_key: str):
-        """Получение списка транзакций связанного с отчетом."""
-        return self.get(f'report:{report_key}')
-
-    def set_report_transaction(self, report_key: str, value: str):
-        """Установка списка транзакций связанного с отчетом."""
-        self.set(f'report:{report_key}', value)
+        await self.set(f'tt_id:{type_name}', type_id)
+
+    async def get_report_version(self, user_id: int) -> int:
+        """Получение версии отчетов пользователя."""
+        version = await self.get(f'report_version:{user_id}')
+        return int(version) if version else 0
+
+    async def incr_report_version(self, user_id: int) -> int:
+        """Увеличение версии отчетов пользователя."""
+        return await self.incr(f'report_version:{user_id}')
+
+    async def get_report_transaction(self, report_key: str):
+        """Получение списка транзакций связанного с отчетом."""
+        value = await self.get(f'report:{report_key}')
+        cache_requests.labels('report', cache_result(value)).inc()
+        return value
+
+    async def set_report_transaction(
+        self,
+        report_key: str,
+        value: bytes,
+        ttl: float | None = None,
+    ):
+        """Установка списка транзакций связанного с отчетом.
+
+        Время жизни по умолчанию `report_cache_ttl` секунд, с
+        неположительным временем жизни отчет не кешируется. Отчеты
+        больше `report_cache_max_size` байт не кешируются.
+        """
+        if ttl is None:
+            ttl = settings.report_cache_ttl
+        if ttl <= 0:
+            return
+        max_size = settings.report_cache_max_size
+        if max_size is not None and len(value) > max_size:
+            report_cache_skipped.inc()
+            return
+        await self.set(f'report:{report_key}', value, ttl=ttl)
+
+    async def acquire_report_lock(self, report_key: str) -> str | None:
+        """Взятие блокировки на построение отчета.
+
+        Возвращает случайный токен блокировки или `None`, если
+        блокировку держит другой процесс. Блокировка снимается сама через
+        `report_lock_ttl_ms`, если взявший ее процесс не успел ее снять.
+        """
+        token = secrets.token_hex()
+        locked = await self.set_nx(
+            f'report_lock:{report_key}',
+            token,
+            settings.report_lock_ttl_ms,
+        )
+        return token if locked else None
+
+    async def release_report_lock(self, report_key: str, token: str) -> None:
+        """Снятие блокировки на построение отчета.
+
+        Блокировка снимается, только если она все еще взята с токеном
+        `token`, а не перешла к другому процессу после истечения времени
+        жизни.
+        """
+        await self.delete_if_equal(f'report_lock:{report_key}', token)
+
+    async def wait_report_transaction(self, report_key: str):
+        """Ожидание, пока отчет закеширует процесс, взявший блокировку.
+
+        Кеш и блокировка опрашиваются раз в `report_lock_poll_interval`
+        секунд не дольше `report_lock_wait` секунд. Процесс снимает
+        блокировку после записи кеша, поэтому если блокировки уже нет,
+        а отчета в кеше нет, отчет не закеширован и ждать дальше нечего.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.report_lock_wait
+        while loop.time() < deadline:
+            await asyncio.sleep(settings.report_lock_poll_interval)
+            value, lock = await self.get_many(
+                f'report:{report_key}',
+                f'report_lock:{report_key}',
+            )
+            if value is not None:
+                report_lock_waits.labels('hit').inc()
+                return value
+            if lock is None:
+                report_lock_waits.labels('released').inc()
+                return None
+        report_lock_waits.labels('timeout').inc()
+        return None
 
 
 redis_client = RedisClient(
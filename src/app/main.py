@@ -1,28 +1,42 @@
 from contextlib import asynccontextmanager
 
 import uvicorn
-from fastapi import FastAPI, status
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import FastAPI, Response, status
 
+from app.config import settings
+from app.db.db_helper import db_helper
 from app.external.jaeger import initialize_jaeger_tracer
 from app.external.redis_client import get_redis_client
-from app.middleware import tracing_middleware
+from app.metrics import PROMETHEUS_CONTENT_TYPE, render_metrics
+from app.middleware import MetricsMiddleware, TracingMiddleware
+from app.transaction_service.group_commit import transaction_group_commit
+from app.transaction_service.transaction_types import (
+    load_transaction_type_registry,
+)
 from app.transaction_service.urls import router as transactions_router
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Настройка при запуске и остановке приложения."""
-    initialize_jaeger_tracer()
+    if settings.jaeger_enabled:
+        initialize_jaeger_tracer()
     redis_client = get_redis_client()
+    async with db_helper.session_factory() as session:
+        await load_transaction_type_registry(session)
+    if settings.transaction_group_commit:
+        transaction_group_commit.start(db_helper.session_factory, redis_client)
     yield
-    redis_client.close()
+    await transaction_group_commit.stop()
+    await redis_client.close()
 
 
 app = FastAPI(lifespan=lifespan)
 app.include_router(transactions_router, prefix='/api')
 
-app.add_middleware(BaseHTTPMiddleware, dispatch=tracing_middleware)
+if settings.jaeger_enabled:
+    app.add_middleware(TracingMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 
 @app.get('/')
@@ -43,6 +57,15 @@ async def live_check():
     return {'message': 'Service is live'}
 
 
+@app.get('/metrics', include_in_schema=False)
+async def metrics() -> Response:
+    """Метрики сервиса в текстовом формате Prometheus."""
+    return Response(
+        content=render_metrics(),
+        media_type=PROMETHEUS_CONTENT_TYPE,
+    )
+
+
 if __name__ == '__main__':
     uvicorn.run(
         'main:app',
@@ -0,0 +1,142 @@
+from collections.abc import Callable, Iterable
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    GC_COLLECTOR,
+    PLATFORM_COLLECTOR,
+    PROCESS_COLLECTOR,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+PROMETHEUS_CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+ROWS_BUCKETS = (0, 10, 100, 1000, 10000, 100000, 1000000)
+SIZE_BUCKETS = (1024, 10240, 102400, 1048576, 10485760)
+
+HTTP_LABEL_NAMES = ('method', 'route', 'status')
+CACHE_LABEL_NAMES = ('key', 'result')
+DB_READ_LABEL_NAMES = ('target',)
+CACHE_UPDATE_LABEL_NAMES = ('operation',)
+LOCK_WAIT_LABEL_NAMES = ('result',)
+
+
+class CallbackGauge(Collector):
+    """Значения, которые вычисляются в момент выдачи метрик.
+
+    Функция возвращает значения по значению единственной метки.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_name: str,
+        collect_values: Callable[[], dict[str, float]],
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_name = label_name
+        self.collect_values = collect_values
+
+    def describe(self) -> Iterable[GaugeMetricFamily]:
+        """Описание метрики без вызова функции."""
+        yield self.family()
+
+    def collect(self) -> Iterable[GaugeMetricFamily]:
+        """Значения, полученные от функции."""
+        gauge = self.family()
+        for label_value, gauge_value in self.collect_values().items():
+            gauge.add_metric([label_value], gauge_value)
+        yield gauge
+
+    def family(self) -> GaugeMetricFamily:
+        """Пустая метрика с именем и меткой коллектора."""
+        return GaugeMetricFamily(
+            self.name,
+            self.documentation,
+            labels=[self.label_name],
+        )
+
+
+metrics_registry = CollectorRegistry()
+for default_collector in (GC_COLLECTOR, PLATFORM_COLLECTOR, PROCESS_COLLECTOR):
+    metrics_registry.register(default_collector)
+
+http_request_duration = Histogram(
+    'http_request_duration_seconds',
+    'Время обработки HTTP запроса.',
+    HTTP_LABEL_NAMES,
+    buckets=LATENCY_BUCKETS,
+    registry=metrics_registry,
+)
+cache_requests = Counter(
+    'redis_cache_requests',
+    'Обращения к кешу Redis.',
+    CACHE_LABEL_NAMES,
+    registry=metrics_registry,
+)
+cache_update_errors = Counter(
+    'cache_update_errors',
+    'Ошибки обновления кеша Redis после commit транзакций.',
+    CACHE_UPDATE_LABEL_NAMES,
+    registry=metrics_registry,
+)
+report_cache_skipped = Counter(
+    'report_cache_skipped',
+    'Отчеты, не сохраненные в кеш из-за `report_cache_max_size`.',
+    registry=metrics_registry,
+)
+report_lock_waits = Counter(
+    'report_lock_waits',
+    'Ожидания отчета, который строит процесс с блокировкой.',
+    LOCK_WAIT_LABEL_NAMES,
+    registry=metrics_registry,
+)
+report_rows = Histogram(
+    'report_rows',
+    'Число транзакций в построенном отчете.',
+    buckets=ROWS_BUCKETS,
+    registry=metrics_registry,
+)
+report_payload_size = Histogram(
+    'report_payload_bytes',
+    'Размер построенного отчета в кеше.',
+    buckets=SIZE_BUCKETS,
+    registry=metrics_registry,
+)
+db_read_sessions = Counter(
+    'db_read_sessions',
+    'Сессии только для чтения по базе, к которой они подключены.',
+    DB_READ_LABEL_NAMES,
+    registry=metrics_registry,
+)
+db_pool_wait = Histogram(
+    'db_pool_wait_seconds',
+    'Время получения соединения из пула БД.',
+    buckets=LATENCY_BUCKETS,
+    registry=metrics_registry,
+)
+db_pool_timeouts = Counter(
+    'db_pool_timeouts',
+    'Запросы, не дождавшиеся соединения из пула БД.',
+    registry=metrics_registry,
+)
+transaction_group_size = Histogram(
+    'transaction_group_size',
+    'Число транзакций, записанных одним групповым commit.',
+    buckets=ROWS_BUCKETS,
+    registry=metrics_registry,
+)
+
+
+def render_metrics() -> bytes:
+    """Метрики сервиса в текстовом формате Prometheus."""
+    return generate_latest(metrics_registry)
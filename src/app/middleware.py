@@ -1,37 +1,123 @@
-from fastapi import Request
+from functools import partial
+from time import perf_counter
+
 from opentracing import (
     InvalidCarrierException,
+    Span,
     SpanContextCorruptedException,
     global_tracer,
     propagation,
     tags,
 )
+from starlette.requests import Request
+from starlette.status import HTTP_500_INTERNAL_SERVER_ERROR
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.config import settings
+from app.metrics import http_request_duration
+
+UNMATCHED_ROUTE = 'unmatched'
+
+
+def is_response_start(message: Message) -> bool:
+    """Проверка, что сообщение начинает ответ."""
+    return message['type'] == 'http.response.start'
+
+
+class TracingMiddleware:
+    """Добавление трассировки запросов.
+
+    Middleware работает напрямую с ASGI, поэтому не создает отдельную
+    задачу и не оборачивает тело ответа, как `BaseHTTPMiddleware`.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """Обработка запроса внутри span."""
+        if scope['type'] != 'http' or not scope['path'].startswith('/api'):
+            return await self.app(scope, receive, send)
+        request = Request(scope)
+        path = request.url.path
+        try:
+            span_ctx = global_tracer().extract(
+                propagation.Format.HTTP_HEADERS,
+                request.headers,
+            )
+        except (InvalidCarrierException, SpanContextCorruptedException):
+            span_ctx = None
+        span_tags = {
+            tags.SPAN_KIND: tags.SPAN_KIND_RPC_SERVER,
+            tags.HTTP_METHOD: request.method,
+            tags.HTTP_URL: str(request.url),
+        }
+        with global_tracer().start_active_span(
+            f'{settings.service_name}_{request.method}_{path}',
+            child_of=span_ctx,
+            tags=span_tags,
+        ) as span_scope:
+            await self.app(
+                scope,
+                receive,
+                partial(self.send_with_status, span_scope.span, send),
+            )
+
+    async def send_with_status(
+        self,
+        span: Span,
+        send: Send,
+        message: Message,
+    ) -> None:
+        """Отправка сообщения ответа с записью статуса в span."""
+        if is_response_start(message):
+            span.set_tag(tags.HTTP_STATUS_CODE, message['status'])
+        await send(message)
+
+
+class MetricsMiddleware:
+    """Запись времени обработки запросов в гистограмму.
+
+    Запрос помечается шаблоном пути маршрута, а не самим путем, чтобы
+    число наборов меток не зависело от параметров в пути.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """Обработка запроса с замером времени."""
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        response_status = {'code': HTTP_500_INTERNAL_SERVER_ERROR}
+        started = perf_counter()
+        try:
+            await self.app(
+                scope,
+                receive,
+                partial(self.send_with_status, response_status, send),
+            )
+        except Exception:
+            self.observe(scope, started, HTTP_500_INTERNAL_SERVER_ERROR)
+            raise
+        self.observe(scope, started, response_status['code'])
 
+    def observe(self, scope: Scope, started: float, status_code: int) -> None:
+        """Запись времени обработки запроса."""
+        route = scope.get('route')
+        http_request_duration.labels(
+            scope['method'],
+            getattr(route, 'path', UNMATCHED_ROUTE),
+            str(status_code),
+        ).observe(perf_counter() - started)
 
-async def tracing_middleware(request: Request, call_next):
-    """Добавление трассировки запросов."""
-    path = request.url.path
-    if not path.startswith('/api'):
-        return await call_next(request)
-    try:
-        span_ctx = global_tracer().extract(
-            propagation.Format.HTTP_HEADERS,
-            request.headers,
-        )
-    except (InvalidCarrierException, SpanContextCorruptedException):
-        span_ctx = None
-    span_tags = {
-        tags.SPAN_KIND: tags.SPAN_KIND_RPC_SERVER,
-        tags.HTTP_METHOD: request.method,
-        tags.HTTP_URL: str(request.url),
-    }
-    with global_tracer().start_active_span(
-        f'{settings.service_name}_{request.method}_{path}',
-        child_of=span_ctx,
-        tags=span_tags,
-    ) as scope:
-        response = await call_next(request)
-        scope.span.set_tag(tags.HTTP_STATUS_CODE, response.status_code)
-        return response
+    async def send_with_status(
+        self,
+        response_status: dict[str, int],
+        send: Send,
+        message: Message,
+    ) -> None:
+        """Отправка сообщения ответа с запоминанием статуса."""
+        if is_response_start(message):
+            response_status['code'] = message['status']
+        await send(message)
@@ -0,0 +1,72 @@
+from collections import Counter
+
+from fastapi import HTTPException, status
+from sqlalchemy import column, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import User
+from app.external.jaeger import tag_active_span, traced
+from app.transaction_service.schemas import TransactionSchema
+
+
+@traced('delta')
+async def update_user_balance(
+    user_id: int,
+    delta: int,
+    session: AsyncSession,
+) -> int:
+    """Изменение баланса пользователя одним UPDATE ... RETURNING.
+
+    Строка пользователя блокируется до конца транзакции БД, поэтому
+    параллельные изменения баланса не теряются.
+    """
+    balance = await session.scalar(
+        update(User)
+        .where(User.id == user_id)
+        .values(balance=User.balance + delta)
+        .returning(User.balance),
+    )
+    if balance is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='User not found',
+        )
+    tag_active_span('balance', balance)
+    return balance
+
+
+@traced()
+async def update_users_balances(
+    transactions: list[TransactionSchema],
+    session: AsyncSession,
+) -> None:
+    """Изменение балансов пользователей пакета транзакций.
+
+    Изменения суммируются по пользователям и применяются одним
+    UPDATE ... FROM (VALUES ...) в порядке id, чтобы параллельные пакеты
+    блокировали строки в одном порядке. Если кого-то из пользователей
+    нет, транзакции пакета не создаются.
+    """
+    deltas: Counter[int] = Counter()
+    for transaction in transactions:
+        deltas[transaction.user_id] += (
+            transaction.transaction_type.sign * transaction.amount
+        )
+    tag_active_span('users', len(deltas))
+    users = User.__table__
+    user_deltas = values(
+        column('id', users.c.id.type),
+        column('delta', users.c.balance.type),
+        name='user_deltas',
+    ).data([(user_id, deltas[user_id]) for user_id in sorted(deltas)])
+    updated_user_ids = await session.scalars(
+        update(users)
+        .where(users.c.id == user_deltas.c.id)
+        .values(balance=users.c.balance + user_deltas.c.delta)
+        .returning(users.c.id),
+    )
+    if set(updated_user_ids) != deltas.keys():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='User not found',
+        )
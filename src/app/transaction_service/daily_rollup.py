@@ -0,0 +1,58 @@
+from collections import Counter
+from collections.abc import Iterable
+from datetime import date
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import UserDailyRollup
+from app.external.jaeger import tag_active_span, traced
+
+
+def daily_rollup_rows(
+    transactions: Iterable[tuple[int, date, int, int]],
+) -> list[tuple[int, date, int, int, int]]:
+    """Суммирование транзакций (user_id, day, transaction_type_id, amount).
+
+    Возвращает строки дневной таблицы в порядке ее колонок. Строки с
+    одинаковым ключом схлопываются, потому что ON CONFLICT не может
+    обновить одну строку дважды за запрос. Строки отсортированы по ключу,
+    чтобы параллельные запросы блокировали их в одном порядке.
+    """
+    counts: Counter[tuple[int, date, int]] = Counter()
+    amounts: Counter[tuple[int, date, int]] = Counter()
+    for user_id, day, transaction_type_id, amount in transactions:
+        rollup_key = (user_id, day, transaction_type_id)
+        counts[rollup_key] += 1
+        amounts[rollup_key] += amount
+    return [
+        (*rollup_key, counts[rollup_key], amounts[rollup_key])
+        for rollup_key in sorted(counts)
+    ]
+
+
+@traced()
+async def update_daily_rollup(
+    rows: list[tuple[int, date, int, int, int]],
+    session: AsyncSession,
+) -> None:
+    """Добавление сумм транзакций к дневным суммам пользователей."""
+    tag_active_span('rows', len(rows))
+    rollup = pg_insert(UserDailyRollup).values(rows)
+    await session.execute(
+        rollup.on_conflict_do_update(
+            index_elements=[
+                UserDailyRollup.user_id,
+                UserDailyRollup.day,
+                UserDailyRollup.transaction_type_id,
+            ],
+            set_={
+                UserDailyRollup.count: (
+                    UserDailyRollup.count + rollup.excluded.count
+                ),
+                UserDailyRollup.amount: (
+                    UserDailyRollup.amount + rollup.excluded.amount
+                ),
+            },
+        ),
+    )
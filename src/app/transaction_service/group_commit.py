@@ -0,0 +1,156 @@
+import asyncio
+from contextlib import suppress
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.external.redis_client import RedisClient
+from app.metrics import transaction_group_size
+from app.transaction_service.schemas import TransactionSchema
+from app.transaction_service.views import (
+    create_transaction_view,
+    create_transactions_batch_view,
+)
+
+PendingTransaction = tuple[TransactionSchema, asyncio.Future[None]]
+
+
+async def write_group(
+    batch: list[PendingTransaction],
+    session_factory: async_sessionmaker[AsyncSession],
+    redis_client: RedisClient,
+) -> None:
+    """Запись группы одной транзакцией БД.
+
+    Ошибки Redis после commit `create_transactions_batch_view` не
+    передает, поэтому исключение означает, что группа не сохранена, и ее
+    транзакции можно записать по одной.
+    """
+    transaction_group_size.observe(len(batch))
+    try:
+        async with session_factory() as session:
+            await create_transactions_batch_view(
+                [transaction for transaction, _ in batch],
+                session,
+                redis_client,
+            )
+    except Exception:
+        await write_each(batch, session_factory, redis_client)
+        return
+    for _, future in batch:
+        if not future.done():
+            future.set_result(None)
+
+
+async def write_each(
+    batch: list[PendingTransaction],
+    session_factory: async_sessionmaker[AsyncSession],
+    redis_client: RedisClient,
+) -> None:
+    """Запись транзакций группы по одной."""
+    for transaction, future in batch:
+        try:
+            async with session_factory() as session:
+                await create_transaction_view(
+                    transaction,
+                    session,
+                    redis_client,
+                )
+        except Exception as error:
+            if not future.done():
+                future.set_exception(error)
+            continue
+        if not future.done():
+            future.set_result(None)
+
+
+class GroupCommitBuffer:
+    """Создание транзакций группами в одной транзакции БД.
+
+    Запросы ставят транзакции в очередь и ждут commit своей группы.
+    Фоновая задача записывает группу, когда в очереди набралось
+    `max_rows` транзакций или прошло `interval` секунд с первой из них.
+    Если группа не записалась, ее транзакции записываются по одной,
+    и ошибку получает только запрос с ошибочной транзакцией.
+    """
+
+    def __init__(self, max_rows: int, interval: float) -> None:
+        self.max_rows = max_rows
+        self.interval = interval
+        self.queue: asyncio.Queue[PendingTransaction | None] = (
+            asyncio.Queue()
+        )
+        self.batch_full = asyncio.Event()
+        self.flusher: asyncio.Task | None = None
+
+    def is_running(self) -> bool:
+        """Запущена ли фоновая запись групп."""
+        return self.flusher is not None
+
+    def start(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        redis_client: RedisClient,
+    ) -> None:
+        """Запуск фоновой записи групп."""
+        self.flusher = asyncio.create_task(
+            self.run(session_factory, redis_client),
+        )
+
+    async def stop(self) -> None:
+        """Остановка после записи уже поставленных в очередь транзакций."""
+        if self.flusher is None:
+            return
+        flusher = self.flusher
+        self.flusher = None
+        self.queue.put_nowait(None)
+        self.batch_full.set()
+        await flusher
+
+    async def submit(self, transaction: TransactionSchema) -> None:
+        """Постановка транзакции в очередь и ожидание commit ее группы."""
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((transaction, future))
+        if self.queue.qsize() + 1 >= self.max_rows:
+            self.batch_full.set()
+        await future
+
+    async def collect(self) -> tuple[list[PendingTransaction], bool]:
+        """Сбор группы и признак того, что запись остановлена."""
+        first = await self.queue.get()
+        if first is None:
+            return [], True
+        batch = [first]
+        # При остановке группа записывается без ожидания
+        if self.is_running() and self.queue.qsize() + 1 < self.max_rows:
+            self.batch_full.clear()
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self.batch_full.wait(), self.interval)
+        while len(batch) < self.max_rows and not self.queue.empty():
+            pending = self.queue.get_nowait()
+            if pending is None:
+                return batch, True
+            batch.append(pending)
+        return batch, False
+
+    async def run(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        redis_client: RedisClient,
+    ) -> None:
+        """Запись групп, пока запись не остановлена."""
+        stopped = False
+        while not stopped:
+            batch, stopped = await self.collect()
+            # Транзакции отмененных запросов не записываются
+            batch = [
+                pending for pending in batch if not pending[1].cancelled()
+            ]
+            if batch:
+                await write_group(batch, session_factory, redis_client)
+
+
+transaction_group_commit = GroupCommitBuffer(
+    max_rows=settings.transaction_group_commit_max_rows,
+    interval=settings.transaction_group_commit_interval,
+)
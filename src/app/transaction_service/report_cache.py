@@ -0,0 +1,101 @@
+from datetime import datetime
+
+from app import metrics
+from app.external.jaeger import traced
+from app.external.redis_client import RedisClient
+from app.transaction_service.schemas import TransactionReportSchema
+from app.transaction_service.transaction_types import save_transaction_type_ids
+
+
+def concat_date(date_start: datetime, date_end: datetime) -> str:
+    """Соединяет даты в строку."""
+    return f'{date_start.isoformat()}_{date_end.isoformat()}'
+
+
+def get_report_key(
+    user_id: int, date_start: datetime, date_end: datetime, version: int,
+) -> str:
+    """Соединяет данные в строку.
+
+    Версия отчетов пользователя увеличивается при создании его транзакций,
+    поэтому закешированные ранее отчеты перестают находиться по ключу.
+    """
+    dates = concat_date(date_start, date_end)
+    return f'{user_id}_v{version}_{dates}'
+
+
+async def get_report_cache_key(
+    report: TransactionReportSchema,
+    redis_client: RedisClient,
+) -> str:
+    """Получение ключа кеша отчета с текущей версией отчетов пользователя.
+
+    Для постраничного запроса в ключ добавляются размер страницы и курсор.
+    """
+    version = await redis_client.get_report_version(report.user_id)
+    report_key = get_report_key(
+        report.user_id,
+        report.date_start,
+        report.date_end,
+        version,
+    )
+    if report.limit is None:
+        return report_key
+    cursor = report.cursor or ''
+    return f'{report_key}_l{report.limit}_c{cursor}'
+
+
+@traced('user_ids')
+async def invalidate_report_cache(
+    user_ids: set[int],
+    redis_client: RedisClient,
+) -> None:
+    """Инвалидация закешированных отчетов пользователей."""
+    for user_id in user_ids:
+        await redis_client.incr_report_version(user_id)
+
+
+async def update_cache_after_commit(
+    user_ids: set[int],
+    created_type_ids: dict[str, int],
+    redis_client: RedisClient,
+) -> None:
+    """Инвалидация отчетов и сохранение новых типов после commit.
+
+    Транзакции уже сохранены, поэтому ошибки Redis не передаются
+    вызывающему, а считаются в `cache_update_errors_total`. Если версия
+    отчетов не увеличилась, закешированные отчеты пользователей могут
+    устареть до истечения `report_cache_ttl`.
+    """
+    try:
+        await invalidate_report_cache(user_ids, redis_client)
+    except Exception:
+        metrics.cache_update_errors.labels('invalidate_report_cache').inc()
+    try:
+        await save_transaction_type_ids(created_type_ids, redis_client)
+    except Exception:
+        metrics.cache_update_errors.labels('save_transaction_type_ids').inc()
+
+
+@traced('report_key')
+async def get_trasactions_form_cache(
+    report_key: str,
+    redis_client: RedisClient,
+) -> bytes | None:
+    """Поиск отчета о транзакциях."""
+    return await redis_client.get_report_transaction(report_key)
+
+
+@traced()
+async def save_report_cache(
+    report_key: str,
+    user_transactions: bytes,
+    redis_client: RedisClient,
+    ttl: float | None = None,
+) -> None:
+    """Сохранение отчета о транзакциях."""
+    await redis_client.set_report_transaction(
+        report_key,
+        user_transactions,
+        ttl,
+    )
@@ -0,0 +1,281 @@
+from collections.abc import AsyncIterator, Awaitable, Callable
+
+from fastapi import Response, status
+from opentracing import global_tracer
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import metrics
+from app.config import settings
+from app.external.jaeger import tag_active_span, traced
+from app.external.redis_client import RedisClient
+from app.transaction_service.report_cache import (
+    get_report_cache_key,
+    get_trasactions_form_cache,
+    save_report_cache,
+)
+from app.transaction_service.reports import (
+    get_user_transactions_in_period,
+    get_user_transactions_page,
+    save_report,
+    stream_user_transactions_in_period,
+)
+from app.transaction_service.schemas import (
+    TransactionOutSchema,
+    TransactionPeriodSchema,
+    TransactionReportSchema,
+)
+from app.utils import (  # noqa: WPS235
+    SingleFlight,
+    cache_dump,
+    cache_load,
+    cache_page_dump,
+    cache_page_load,
+    cache_wire_payload,
+    encode_cursor,
+    json_wire_dump,
+    ndjson_dump,
+)
+
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+# Выбор реплики для чтения, None - реплики нет и читать из основной БД
+ReplicaFactory = Callable[
+    [],
+    Awaitable[async_sessionmaker[AsyncSession] | None],  # noqa: WPS465
+]
+
+report_flights: SingleFlight[list] = SingleFlight()
+
+
+def page_response(payload: bytes, next_cursor: str | None) -> Response:
+    """Ответ API со страницей отчета и курсором следующей страницы."""
+    response = Response(
+        content=payload,
+        status_code=status.HTTP_201_CREATED,
+        media_type='application/json',
+    )
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
+
+
+@traced('report')
+async def get_transactions_page_view(
+    report: TransactionReportSchema,
+    limit: int,
+    session: AsyncSession,
+    redis_client: RedisClient,
+) -> Response:
+    """Получение страницы транзакций.
+
+    Отчет сохраняется только при запросе первой страницы.
+    """
+    report_key = await get_report_cache_key(report, redis_client)
+    cashed_page = await get_trasactions_form_cache(
+        report_key,
+        redis_client,
+    )
+    if cashed_page is not None:
+        page = cache_page_load(cashed_page)
+        if page is not None:
+            return page_response(*page)
+
+    user_transactions_orm = await get_user_transactions_page(
+        report,
+        limit,
+        session,
+    )
+    next_cursor = None
+    if len(user_transactions_orm) > limit:
+        user_transactions_orm = user_transactions_orm[:limit]
+        last = user_transactions_orm[-1]
+        next_cursor = encode_cursor(last.date, last.id)
+
+    if report.cursor is None:
+        await save_report(report, session)
+    user_transactions_out = [
+        TransactionOutSchema.model_validate(transaction)
+        for transaction in user_transactions_orm
+    ]
+    tag_active_span('page_size', len(user_transactions_out))
+
+    payload = json_wire_dump(user_transactions_out)
+    await save_report_cache(
+        report_key,
+        cache_page_dump(payload, next_cursor),
+        redis_client,
+    )
+
+    return page_response(payload, next_cursor)
+
+
+async def stream_transactions_view(
+    report: TransactionPeriodSchema,
+    session_factory: async_sessionmaker[AsyncSession],
+) -> AsyncIterator[bytes]:
+    """Потоковая выдача транзакций за период в формате NDJSON.
+
+    Транзакции читаются серверным курсором порциями по
+    `report_stream_chunk_size`, поэтому память не зависит от размера
+    отчета. Статус ответа уже отправлен, когда начинается выдача,
+    поэтому отчет сохраняется до нее через `save_report`. Ответ в кеш
+    не сохраняется.
+    """
+    async with session_factory() as session:
+        with global_tracer().start_active_span('stream_transactions_view'):
+            tag_active_span('report', report)
+            transactions = await stream_user_transactions_in_period(
+                report.user_id,
+                report.date_start,
+                report.date_end,
+                session,
+            )
+            count = 0
+            async for partition in transactions.partitions():
+                count += len(partition)
+                yield ndjson_dump([
+                    TransactionOutSchema.model_validate(transaction)
+                    for transaction in partition
+                ])
+            tag_active_span('count', count)
+
+
+@traced()
+async def build_transactions_report(
+    report: TransactionReportSchema,
+    report_key: str,
+    session: AsyncSession,
+    redis_client: RedisClient,
+    replica_factory: ReplicaFactory | None = None,
+) -> list[TransactionOutSchema]:
+    """Построение отчета по БД с сохранением отчета и кеша.
+
+    Транзакции читаются с реплики, которую выбирает `replica_factory`,
+    если она доступна, иначе через `session`. Отчет сохраняется через
+    `session`. Связи отчета с транзакциями `save_report` выбирает в
+    основной БД, поэтому при отставании реплики они могут не совпадать
+    с возвращенными транзакциями. Отчет, прочитанный с реплики,
+    кешируется не дольше `db_replica_max_lag` секунд, чтобы устаревшие
+    строки не остались в кеше под новой версией отчетов.
+    """
+    read_session_factory = None
+    if replica_factory is not None:
+        read_session_factory = await replica_factory()
+    if read_session_factory is None:
+        user_transactions_orm = await get_user_transactions_in_period(
+            report.user_id,
+            report.date_start,
+            report.date_end,
+            session,
+        )
+    else:
+        async with read_session_factory() as read_session:
+            user_transactions_orm = await get_user_transactions_in_period(
+                report.user_id,
+                report.date_start,
+                report.date_end,
+                read_session,
+            )
+
+    await save_report(report, session)
+    user_transactions_out = [
+        TransactionOutSchema.model_validate(transaction)
+        for transaction in user_transactions_orm
+    ]
+
+    tag_active_span('user_transactions_out_count', len(user_transactions_out))
+    metrics.report_rows.observe(len(user_transactions_out))
+
+    user_transaction_cashed = cache_dump(user_transactions_out)
+    metrics.report_payload_size.observe(len(user_transaction_cashed))
+    cache_ttl: float = settings.report_cache_ttl
+    if read_session_factory is not None:
+        cache_ttl = min(cache_ttl, settings.db_replica_max_lag)
+    await save_report_cache(
+        report_key,
+        user_transaction_cashed,
+        redis_client,
+        cache_ttl,
+    )
+
+    return user_transactions_out
+
+
+async def compute_transactions_report(
+    report: TransactionReportSchema,
+    report_key: str,
+    session: AsyncSession,
+    redis_client: RedisClient,
+    replica_factory: ReplicaFactory | None = None,
+) -> list:
+    """Построение отчета, если его уже не строит другой процесс.
+
+    Процесс, взявший блокировку в Redis, строит отчет, остальные ждут,
+    пока он появится в кеше. Если ожидание не дождалось кеша, отчет
+    строится без блокировки.
+    """
+    lock_token = await redis_client.acquire_report_lock(report_key)
+    if lock_token is None:
+        cashed_transactions = await redis_client.wait_report_transaction(
+            report_key,
+        )
+        if cashed_transactions is not None:
+            return cache_load(cashed_transactions)
+    # Блокировка снимается и при ошибке, чтобы ожидающие процессы сразу
+    # строили отчет сами, а не ждали `report_lock_wait`
+    try:  # noqa: WPS501
+        return await build_transactions_report(
+            report,
+            report_key,
+            session,
+            redis_client,
+            replica_factory,
+        )
+    finally:
+        if lock_token is not None:
+            await redis_client.release_report_lock(report_key, lock_token)
+
+
+@traced('report')
+async def get_transactions_view(
+    report: TransactionReportSchema,
+    session: AsyncSession,
+    redis_client: RedisClient,
+    replica_factory: ReplicaFactory | None = None,
+) -> list[TransactionOutSchema] | Response:
+    """Получение списка транзакций.
+
+    Если отчет закеширован в формате ответа API, он возвращается
+    готовым `Response` без разбора и повторной валидации. Одновременные
+    промахи кеша по одному ключу строят отчет один раз. Транзакции
+    отчета читаются с реплики из `replica_factory`, она выбирается
+    только при промахе кеша.
+    """
+    report_key = await get_report_cache_key(report, redis_client)
+    cashed_transactions = await get_trasactions_form_cache(
+        report_key,
+        redis_client,
+    )
+    if cashed_transactions is not None:
+        payload = cache_wire_payload(cashed_transactions)
+        if payload is not None:
+            tag_active_span('cashed_transactions_size', len(payload))
+            return Response(
+                content=payload,
+                status_code=status.HTTP_201_CREATED,
+                media_type='application/json',
+            )
+
+        loaded_transactions = cache_load(cashed_transactions)
+        tag_active_span('cashed_transactions_count', len(loaded_transactions))
+        return loaded_transactions
+
+    return await report_flights.do(
+        report_key,
+        compute_transactions_report,
+        report,
+        report_key,
+        session,
+        redis_client,
+        replica_factory,
+    )
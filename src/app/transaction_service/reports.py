@@ -0,0 +1,210 @@
+from collections.abc import Awaitable
+from datetime import datetime
+
+from sqlalchemy import ColumnElement, and_, literal, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncScalarResult, AsyncSession
+
+from app.config import settings
+from app.db.models import (
+    ReportTransactionRelation,
+    TransactionReport,
+    UserTransaction,
+)
+from app.external.jaeger import tag_active_span, traced
+from app.transaction_service.schemas import (
+    TransactionPeriodSchema,
+    TransactionReportSchema,
+)
+
+
+def user_transactions_in_period(
+    user_id: int,
+    date_start: datetime,
+    date_end: datetime,
+) -> ColumnElement[bool]:
+    """Условие отбора транзакций пользователя за период.
+
+    Условие на `date` позволяет Postgres читать только секции месяцев
+    периода.
+    """
+    return and_(
+        UserTransaction.user_id == user_id,
+        UserTransaction.date.between(date_start, date_end),
+    )
+
+
+@traced('user_id')
+async def create_report(
+    user_id: int,
+    date_start: datetime,
+    date_end: datetime,
+    session: AsyncSession,
+) -> int:
+    """Создание отчета о транзакциях или получение id такого же отчета.
+
+    Как и для типов транзакций, вместо DO NOTHING используется пустое
+    обновление, чтобы RETURNING возвращал id уже существующего отчета.
+    """
+    statement = pg_insert(TransactionReport).values(
+        user_id=user_id,
+        date_start=date_start,
+        date_end=date_end,
+    )
+    created = await session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[
+                TransactionReport.user_id,
+                TransactionReport.date_start,
+                TransactionReport.date_end,
+            ],
+            set_={TransactionReport.user_id: statement.excluded.user_id},
+        ).returning(TransactionReport.id),
+    )
+    report_id = created.scalar_one()
+    tag_active_span('id created report', report_id)
+    return report_id
+
+
+@traced('report_id')
+async def create_report_transaction_relations(
+    report_id: int,
+    user_id: int,
+    date_start: datetime,
+    date_end: datetime,
+    session: AsyncSession,
+) -> None:
+    """Сохранение транзакций отчета одним INSERT ... SELECT.
+
+    Связи, уже сохраненные для отчета, пропускаются, дописываются только
+    новые транзакции периода.
+    """
+    await session.execute(
+        pg_insert(ReportTransactionRelation).from_select(
+            ['report_id', 'transaction_id'],
+            select(
+                literal(report_id, ReportTransactionRelation.report_id.type),
+                UserTransaction.id,
+            )
+            .where(
+                user_transactions_in_period(user_id, date_start, date_end),
+            ),
+        ).on_conflict_do_nothing(
+            index_elements=[
+                ReportTransactionRelation.report_id,
+                ReportTransactionRelation.transaction_id,
+            ],
+        ),
+    )
+
+
+@traced('report_in')
+async def save_report(
+    report_in: TransactionPeriodSchema,
+    session: AsyncSession,
+) -> None:
+    """Сохранение отчета о транзакциях.
+
+    Повторный отчет пользователя за тот же период сохраняется в уже
+    существующую строку отчета.
+    """
+    report_id = await create_report(
+        report_in.user_id,
+        report_in.date_start,
+        report_in.date_end,
+        session,
+    )
+
+    await create_report_transaction_relations(
+        report_id,
+        report_in.user_id,
+        report_in.date_start,
+        report_in.date_end,
+        session,
+    )
+    await session.commit()
+
+
+@traced('user_id')
+async def get_user_transactions_in_period(
+    user_id: int,
+    date_start: datetime,
+    date_end: datetime,
+    session: AsyncSession,
+) -> list[UserTransaction]:
+    """Получение списка транзакций за период."""
+    transactions = await session.scalars(
+        select(UserTransaction)
+        .where(user_transactions_in_period(user_id, date_start, date_end)),
+    )
+
+    return list(transactions)
+
+
+def stream_user_transactions_in_period(
+    user_id: int,
+    date_start: datetime,
+    date_end: datetime,
+    session: AsyncSession,
+) -> Awaitable[AsyncScalarResult[UserTransaction]]:
+    """Чтение транзакций за период серверным курсором.
+
+    Строки читаются порциями по `report_stream_chunk_size`.
+    """
+    return session.stream_scalars(
+        select(UserTransaction)
+        .where(user_transactions_in_period(user_id, date_start, date_end))
+        .execution_options(yield_per=settings.report_stream_chunk_size),
+    )
+
+
+def after_transaction(
+    transaction_date: datetime,
+    transaction_id: int,
+) -> ColumnElement[bool]:
+    """Условие отбора транзакций, идущих после заданной по (date, id).
+
+    По сравнению кортежей секции не отсекаются, поэтому к нему добавлено
+    отдельное условие на `date`.
+    """
+    transaction_key = tuple_(UserTransaction.date, UserTransaction.id)
+    return and_(
+        UserTransaction.date >= transaction_date,
+        transaction_key > tuple_(
+            literal(transaction_date),
+            literal(transaction_id),
+        ),
+    )
+
+
+@traced('limit')
+async def get_user_transactions_page(
+    report: TransactionReportSchema,
+    limit: int,
+    session: AsyncSession,
+) -> list[UserTransaction]:
+    """Получение страницы транзакций за период по ключу (date, id).
+
+    Следующая страница начинается строго после последней транзакции
+    предыдущей, поэтому стоимость запроса не зависит от номера страницы.
+    Возвращается на одну транзакцию больше, чтобы понять, есть ли
+    следующая страница.
+    """
+    query = (
+        select(UserTransaction)
+        .where(
+            user_transactions_in_period(
+                report.user_id,
+                report.date_start,
+                report.date_end,
+            ),
+        )
+        .order_by(UserTransaction.date, UserTransaction.id)
+        .limit(limit + 1)
+    )
+    position = report.cursor_position
+    if position is not None:
+        query = query.where(after_transaction(*position))
+    transactions = await session.scalars(query)
+
+    return list(transactions)
@@ -1,7 +1,17 @@
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
+from typing import Self
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    field_validator,
+    model_validator,
+)
+
+from app.config import settings
+from app.utils import decode_cursor
 
 
 class TransactionTypeSchema(Enum):
@@ -10,6 +20,13 @@ class TransactionTypeSchema(Enum):
     DEPOSIT = 'Пополнение'
     WITHDRAWAL = 'Снятие'
 
+    @property
+    def sign(self) -> int:
+        """Знак, с которым сумма транзакции меняет баланс пользователя."""
+        if self is TransactionTypeSchema.WITHDRAWAL:
+            return -1
+        return 1
+
 
 class TransactionSchema(BaseModel):
     """Схема транзакции."""
@@ -19,6 +36,13 @@ class TransactionSchema(BaseModel):
     transaction_type: TransactionTypeSchema
 
 
+class UserBalanceSchema(BaseModel):
+    """Схема баланса пользователя."""
+
+    user_id: int
+    balance: int
+
+
 class TransactionOutSchema(BaseModel):
     """Схема вывода транзакции."""
 
@@ -30,9 +54,75 @@ class TransactionOutSchema(BaseModel):
     date: datetime
 
 
-class TransactionReportSchema(BaseModel):
-    """Схема отчета о транзакциях."""
+class TransactionPeriodSchema(BaseModel):
+    """Схема транзакций пользователя за период."""
 
     user_id: int
     date_start: datetime
     date_end: datetime
+
+
+class TransactionReportSchema(TransactionPeriodSchema):
+    """Схема отчета о транзакциях."""
+
+    limit: int | None = Field(
+        default=None,
+        gt=0,
+        le=settings.report_page_max_size,
+    )
+    cursor: str | None = None
+
+    @field_validator('cursor')
+    @classmethod
+    def check_cursor(cls, cursor: str | None) -> str | None:
+        """Проверка, что курсор выдан сервисом."""
+        if cursor is None:
+            return cursor
+        try:
+            decode_cursor(cursor)
+        except ValueError as error:
+            raise ValueError('invalid cursor') from error
+        return cursor
+
+    @model_validator(mode='after')
+    def check_pagination(self) -> Self:
+        """Курсор имеет смысл только вместе с размером страницы."""
+        if self.cursor is not None and self.limit is None:
+            raise ValueError('cursor requires limit')
+        return self
+
+    @property
+    def cursor_position(self) -> tuple[datetime, int] | None:
+        """Ключ (date, id) последней транзакции предыдущей страницы."""
+        if self.cursor is None:
+            return None
+        return decode_cursor(self.cursor)
+
+
+class TransactionStreamReportSchema(TransactionPeriodSchema):
+    """Схема потокового отчета о транзакциях.
+
+    Отчет выдается целиком, поэтому параметры страниц, как и другие
+    неизвестные поля, отклоняются.
+    """
+
+    model_config = ConfigDict(extra='forbid')
+
+
+class TransactionAggregateReportSchema(BaseModel):
+    """Схема отчета о суммах транзакций по дням."""
+
+    user_id: int
+    date_start: date
+    date_end: date
+
+
+class TransactionDailyTotalSchema(BaseModel):
+    """Схема вывода суммы транзакций за день по типу транзакции."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    day: date
+    transaction_type_id: int
+    count: int
+    amount: int
@@ -0,0 +1,93 @@
+from sqlalchemy import ScalarSelect, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.dml import ReturningInsert
+
+from app.db.models import TransactionType
+from app.external.jaeger import tag_active_span, traced
+from app.external.redis_client import RedisClient
+from app.transaction_service.schemas import TransactionTypeSchema
+from app.transaction_service.type_registry import transaction_type_registry
+
+
+def upsert_transaction_types(
+    names: list[str],
+) -> ReturningInsert[tuple[int, str]]:
+    """Запрос, создающий типы транзакций и возвращающий их id и имена.
+
+    Вместо DO NOTHING используется пустое обновление, чтобы RETURNING
+    возвращал id и для уже существующих строк, в том числе созданных
+    параллельной транзакцией.
+    """
+    statement = pg_insert(TransactionType).values(
+        [{'name': name} for name in names],
+    )
+    return statement.on_conflict_do_update(
+        index_elements=[TransactionType.name],
+        set_={'name': statement.excluded.name},
+    ).returning(TransactionType.id, TransactionType.name)
+
+
+def upsert_transaction_type_id(name: str) -> ScalarSelect[int]:
+    """Подзапрос с id типа транзакции, создающий тип при отсутствии."""
+    transaction_type = upsert_transaction_types([name]).cte(
+        'upserted_transaction_type',
+    )
+    return select(transaction_type.c.id).scalar_subquery()
+
+
+@traced('names')
+async def get_or_create_transaction_types(
+    names: list[str],
+    session: AsyncSession,
+) -> dict[str, int]:
+    """Получение или создание типов транзакций одним запросом."""
+    transaction_types = await session.execute(
+        upsert_transaction_types(names),
+    )
+    return {
+        transaction_type.name: transaction_type.id
+        for transaction_type in transaction_types
+    }
+
+
+@traced()
+async def load_transaction_type_registry(session: AsyncSession) -> None:
+    """Создание всех типов транзакций и загрузка их id в реестр."""
+    type_ids = await get_or_create_transaction_types(
+        [type_schema.value for type_schema in TransactionTypeSchema],
+        session,
+    )
+    await session.commit()
+    transaction_type_registry.update(type_ids)
+
+
+@traced('type_name')
+async def get_transaction_type_id(
+    type_name: str,
+    redis_client: RedisClient,
+) -> int | None:
+    """Получение id типа транзакции из реестра или кеша."""
+    type_id = transaction_type_registry.get(type_name)
+    if type_id is not None:
+        return type_id
+
+    cached_type_id = await redis_client.get_transaciton_type_id(type_name)
+    if cached_type_id is None:
+        return None
+
+    tag_active_span('transaction_type_id from cache', cached_type_id)
+    type_id = int(cached_type_id)
+    transaction_type_registry.update({type_name: type_id})
+    return type_id
+
+
+@traced()
+async def save_transaction_type_ids(
+    type_ids: dict[str, int],
+    redis_client: RedisClient,
+) -> None:
+    """Сохранение id типов транзакций в реестр и кеш."""
+    transaction_type_registry.update(type_ids)
+    for type_name, type_id in type_ids.items():
+        await redis_client.set_transaciton_type_id(type_name, type_id)
@@ -0,0 +1,20 @@
+class TransactionTypeRegistry:
+    """Id типов транзакций в памяти процесса."""
+
+    def __init__(self) -> None:
+        self.type_ids: dict[str, int] = {}
+
+    def get(self, type_name: str) -> int | None:
+        """Получение id типа транзакции по имени."""
+        return self.type_ids.get(type_name)
+
+    def update(self, type_ids: dict[str, int]) -> None:
+        """Сохранение id типов транзакций."""
+        self.type_ids.update(type_ids)
+
+    def clear(self) -> None:
+        """Очистка реестра."""
+        self.type_ids.clear()
+
+
+transaction_type_registry = TransactionTypeRegistry()
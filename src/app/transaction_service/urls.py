@@ -1,20 +1,43 @@
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Annotated
 
+from fastapi import APIRouter, Body, Depends, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
 from app.db.db_helper import db_helper
 from app.external.redis_client import RedisClient, get_redis_client
+from app.transaction_service.group_commit import transaction_group_commit
+from app.transaction_service.report_views import (
+    ReplicaFactory,
+    get_transactions_page_view,
+    get_transactions_view,
+    stream_transactions_view,
+)
+from app.transaction_service.reports import save_report
 from app.transaction_service.schemas import (
+    TransactionAggregateReportSchema,
+    TransactionDailyTotalSchema,
     TransactionOutSchema,
     TransactionReportSchema,
     TransactionSchema,
+    TransactionStreamReportSchema,
+    UserBalanceSchema,
 )
 from app.transaction_service.views import (
     create_transaction_view,
-    get_transactions_view,
+    create_transactions_batch_view,
+    get_daily_totals_view,
+    get_user_balance_view,
 )
 
 router = APIRouter(tags=['transactions'])
 
+TransactionBatch = Annotated[
+    list[TransactionSchema],
+    Body(max_length=settings.transactions_batch_max_size),
+]
+
 
 @router.get(
     '/healthz/ready/',
@@ -34,22 +57,116 @@ async def create_transaction(
     redis_client: RedisClient = Depends(get_redis_client),
     session: AsyncSession = Depends(db_helper.scoped_session_dependency),
 ) -> None:
-    """Создание новой транзакции."""
+    """Создание новой транзакции.
+
+    При включенном групповом commit транзакция записывается вместе с
+    другими, ответ возвращается после commit ее группы.
+    """
+    if transaction_group_commit.is_running():
+        return await transaction_group_commit.submit(transaction)
     return await create_transaction_view(transaction, session, redis_client)
 
 
+@router.post(
+    '/transactions/batch/',
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_transactions_batch(
+    transactions: TransactionBatch,
+    redis_client: RedisClient = Depends(get_redis_client),
+    session: AsyncSession = Depends(db_helper.scoped_session_dependency),
+) -> list[int]:
+    """Пакетное создание транзакций."""
+    return await create_transactions_batch_view(
+        transactions,
+        session,
+        redis_client,
+    )
+
+
+@router.get(
+    '/transactions/balance/{user_id}/',
+    status_code=status.HTTP_200_OK,
+)
+async def get_user_balance(
+    user_id: int,
+    session: AsyncSession = Depends(db_helper.scoped_session_dependency),
+) -> UserBalanceSchema:
+    """Получение баланса пользователя."""
+    return await get_user_balance_view(user_id, session)
+
+
 @router.post(
     '/transactions/report/',
     status_code=status.HTTP_201_CREATED,
+    response_model=list[TransactionOutSchema],
 )
 async def get_transactions(
     transaction_report: TransactionReportSchema,
     redis_client: RedisClient = Depends(get_redis_client),
     session: AsyncSession = Depends(db_helper.scoped_session_dependency),
-) -> list[TransactionOutSchema]:
-    """Получение списка транзакции."""
+    replica_factory: ReplicaFactory = Depends(
+        db_helper.replica_factory_dependency,
+    ),
+) -> list[TransactionOutSchema] | Response:
+    """Получение списка транзакции.
+
+    С параметром `limit` возвращается одна страница, курсор следующей
+    страницы передается в заголовке `X-Next-Cursor`. Транзакции полного
+    отчета читаются с реплики, если она доступна.
+    """
+    if transaction_report.limit is not None:
+        return await get_transactions_page_view(
+            transaction_report,
+            transaction_report.limit,
+            session,
+            redis_client,
+        )
     return await get_transactions_view(
         transaction_report,
         session,
         redis_client,
+        replica_factory,
+    )
+
+
+@router.post(
+    '/transactions/report/aggregate/',
+    status_code=status.HTTP_201_CREATED,
+    response_model=list[TransactionDailyTotalSchema],
+)
+async def get_daily_totals(
+    aggregate_report: TransactionAggregateReportSchema,
+    session: AsyncSession = Depends(db_helper.scoped_session_dependency),
+) -> list[TransactionDailyTotalSchema]:
+    """Получение сумм транзакций по дням и типам транзакций."""
+    daily_totals = await get_daily_totals_view(aggregate_report, session)
+    return [
+        TransactionDailyTotalSchema.model_validate(daily_total)
+        for daily_total in daily_totals
+    ]
+
+
+@router.post(
+    '/transactions/report/stream/',
+    status_code=status.HTTP_201_CREATED,
+    response_class=StreamingResponse,
+)
+async def stream_transactions(
+    transaction_report: TransactionStreamReportSchema,
+    session_factory: async_sessionmaker[AsyncSession] = Depends(
+        db_helper.session_factory_dependency,
+    ),
+) -> StreamingResponse:
+    """Потоковое получение транзакций в формате NDJSON.
+
+    Отчет сохраняется до отправки статуса ответа, чтобы ошибка БД
+    вернулась клиенту кодом ответа, а не оборванным телом.
+    """
+    async with session_factory() as session:
+        await save_report(transaction_report, session)
+    return StreamingResponse(
+        stream_transactions_view(transaction_report, session_factory),
+        status_code=status.HTTP_201_CREATED,
+        media_type='application/x-ndjson',
     )
@@ -1,310 +1,305 @@
 from datetime import datetime
 
 from fastapi import HTTPException, status
-from opentracing import global_tracer
-from sqlalchemy import select
+from sqlalchemy import Row, ScalarSelect, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
-from app.db.models import TransactionReport, TransactionType, UserTransaction
+from app.db.models import User, UserDailyRollup, UserTransaction
+from app.external.jaeger import tag_active_span, traced
 from app.external.redis_client import RedisClient
+from app.transaction_service.balances import (
+    update_user_balance,
+    update_users_balances,
+)
+from app.transaction_service.daily_rollup import (
+    daily_rollup_rows,
+    update_daily_rollup,
+)
+from app.transaction_service.report_cache import update_cache_after_commit
 from app.transaction_service.schemas import (
-    TransactionOutSchema,
-    TransactionReportSchema,
+    TransactionAggregateReportSchema,
     TransactionSchema,
+    UserBalanceSchema,
+)
+from app.transaction_service.transaction_types import (
+    get_or_create_transaction_types,
+    get_transaction_type_id,
+    upsert_transaction_type_id,
 )
-from app.utils import json_nested_dump, json_nested_load
-
-
-async def create_transation_type(
-    name: str,
-    session: AsyncSession,
-) -> TransactionType:
-    """Создание типа транзакции."""
-    with global_tracer().start_active_span('create_transation_type') as scope:
-        scope.span.set_tag('name', name)
-        transaction_type = TransactionType(name=name)
-        session.add(transaction_type)
-        await session.commit()
-
-        scope.span.set_tag('id created transaction_type', transaction_type.id)
-        return transaction_type
-
-
-async def get_transation_type_by_name(
-    name: str,
-    session: AsyncSession,
-) -> TransactionType | None:
-    """Получение типа транзакции по имени."""
-    with global_tracer().start_active_span('get_transation_type_by_name'):
-        return await session.scalar(
-            select(TransactionType)
-            .where(TransactionType.name == name),
-        )
-
-
-async def get_or_create_transaction_type(
-    name: str,
-    session: AsyncSession,
-) -> TransactionType:
-    """Получение или создание типа транзакции."""
-    with global_tracer().start_active_span('get_or_create_transaction_type') as scope:  # noqa: E501
-        scope.span.set_tag('name', name)
-        transaction_type = await get_transation_type_by_name(name, session)
-
-        if transaction_type:
-            scope.span.set_tag(
-                'transaction_type_id founded in db',
-                transaction_type.id,
-            )
-            return transaction_type
-
-        transaction_type = await create_transation_type(
-            name=name,
-            session=session,
-        )
-
-        scope.span.set_tag('transaction_type_id created', transaction_type.id)
-
-        return transaction_type
-
-
-async def get_or_create_transaction_type_id(
-    type_name: str,
-    session: AsyncSession,
-    redis_client: RedisClient,
-) -> int:
-    """Получение id типа транзакции."""
-    with global_tracer().start_active_span('get_or_create_transaction_type_id') as scope:  # noqa: E501
-        scope.span.set_tag('type_name', type_name)
-
-        type_id = redis_client.get_transaciton_type_id(type_name)
-        if type_id:
-            scope.span.set_tag('transaction_type_id from cache', type_id)
-            return int(type_id)
-
-        transaction_type = await get_or_create_transaction_type(
-            type_name,
-            session,
-        )
-
-        redis_client.set_transaciton_type_id(type_name, transaction_type.id)
-
-        scope.span.set_tag(
-            'transaction_type_id saved in cache',
-            transaction_type.id,
-        )
-        return transaction_type.id
 
 
+@traced('user_id', 'amount')
 async def create_user_transaction(
     user_id: int,
     amount: int,
-    transaction_type_id: int,
+    transaction_type_id: int | ScalarSelect[int],
     session: AsyncSession,
-) -> UserTransaction:
-    """Создание новой транзакции."""
-    with global_tracer().start_active_span('create_user_transaction') as scope:
-        scope.span.set_tag('user_id', user_id)
-        scope.span.set_tag('amount', amount)
-        scope.span.set_tag('transaction_type_id', transaction_type_id)
-        transaction_bd = UserTransaction(
+) -> Row[tuple[int, int, datetime]]:
+    """Создание новой транзакции и обновление дневной суммы пользователя.
+
+    `transaction_type_id` может быть подзапросом из
+    `upsert_transaction_type_id`, тогда тип транзакции создается тем же
+    запросом.
+    """
+    created = await session.execute(
+        insert(UserTransaction)
+        .values(
             user_id=user_id,
             amount=amount,
             transaction_type_id=transaction_type_id,
             date=datetime.now(),
         )
-        session.add(transaction_bd)
-        await session.commit()
-
-        scope.span.set_tag('id created transaction', transaction_bd.id)
-        return transaction_bd
-
-
+        .returning(
+            UserTransaction.id,
+            UserTransaction.transaction_type_id,
+            UserTransaction.date,
+        ),
+    )
+    transaction = created.one()
+    await update_daily_rollup(
+        daily_rollup_rows([(
+            user_id,
+            transaction.date.date(),
+            transaction.transaction_type_id,
+            amount,
+        )]),
+        session,
+    )
+
+    tag_active_span('id created transaction', transaction.id)
+    tag_active_span(
+        'transaction_type_id',
+        transaction.transaction_type_id,
+    )
+    return transaction
+
+
+async def apply_user_transaction(
+    transaction: TransactionSchema,
+    transaction_type_id: int | ScalarSelect[int],
+    session: AsyncSession,
+) -> Row[tuple[int, int, datetime]]:
+    """Изменение баланса пользователя и создание транзакции."""
+    await update_user_balance(
+        transaction.user_id,
+        transaction.transaction_type.sign * transaction.amount,
+        session,
+    )
+    return await create_user_transaction(
+        transaction.user_id,
+        transaction.amount,
+        transaction_type_id,
+        session,
+    )
+
+
+@traced('transaction')
 async def create_transaction_view(
     transaction: TransactionSchema,
     session: AsyncSession,
     redis_client: RedisClient,
 ) -> None:
-    """Создание новой транзакции."""
-    with global_tracer().start_active_span('create_transaction_view') as scope:
-        scope.span.set_tag('transaction', str(transaction))
-        transaction_type_id = await get_or_create_transaction_type_id(
-            transaction.transaction_type.value,
-            session,
-            redis_client,
-        )
-
-        await create_user_transaction(
-            transaction.user_id,
-            transaction.amount,
-            transaction_type_id,
-            session,
+    """Создание новой транзакции с изменением баланса пользователя."""
+    type_name = transaction.transaction_type.value
+    transaction_type_id = await get_transaction_type_id(
+        type_name,
+        redis_client,
+    )
+
+    if transaction_type_id is None:
+        transaction_type: int | ScalarSelect[int] = (
+            upsert_transaction_type_id(type_name)
         )
-
-
-def concat_date(date_start: datetime, date_end: datetime) -> str:
-    """Соединяет даты в строку."""
-    return f'{date_start.isoformat()}_{date_end.isoformat()}'
-
-
-def get_report_key(
-    user_id: int, date_start: datetime, date_end: datetime,
-) -> str:
-    """Соединяет данные в строку."""
-    dates = concat_date(date_start, date_end)
-    return f'{user_id}_{dates}'
-
-
-async def create_report(
-    user_id: int,
-    date_start: datetime,
-    date_end: datetime,
+    else:
+        transaction_type = transaction_type_id
+
+    created = await apply_user_transaction(
+        transaction,
+        transaction_type,
+        session,
+    )
+    await session.commit()
+
+    created_type_ids = {}
+    if transaction_type_id is None:
+        created_type_ids[type_name] = created.transaction_type_id
+    await update_cache_after_commit(
+        {transaction.user_id},
+        created_type_ids,
+        redis_client,
+    )
+
+
+@traced()
+async def create_user_transactions(
+    transactions: list[TransactionSchema],
+    transaction_type_ids: dict[str, int],
     session: AsyncSession,
-) -> TransactionReport:
-    """Создание отчета о транзакциях."""
-    with global_tracer().start_active_span('create_report') as scope:
-        scope.span.set_tag('user_id', user_id)
-        report = TransactionReport(
-            user_id=user_id,
-            date_start=date_start,
-            date_end=date_end,
-        )
-        session.add(report)
-        await session.commit()
-        scope.span.set_tag('id created report', report.id)
-        return report
-
-
-async def create_report_transaction_relations(
-    report_id: int,
-    user_transactions: list[UserTransaction],
-    session: AsyncSession,
-) -> None:
-    """Сохранение транзакций."""
-    with global_tracer().start_active_span('create_report_transaction_relations') as scope:  # noqa: E501
-        scope.span.set_tag('report_id', report_id)
-
-        report = await session.scalar(
-            select(TransactionReport)
-            .where(TransactionReport.id == report_id)
-            .options(
-                selectinload(TransactionReport.transactions),
-            ),
-        )
-        if report is None:
-            scope.span.set_tag('error', 'Отчет не найден')
-            raise HTTPException(status.HTTP_404_NOT_FOUND, 'Отчет не найден')
-
-        report.transactions.extend(user_transactions)
-
-        await session.commit()
+) -> list[int]:
+    """Создание транзакций одним многострочным INSERT.
+
+    Дневные суммы пользователей обновляются одним запросом на весь пакет.
+    """
+    tag_active_span('count', len(transactions))
+    now = datetime.now()
+    transaction_ids = await session.scalars(
+        insert(UserTransaction).returning(
+            UserTransaction.id,
+            sort_by_parameter_order=True,
+        ),
+        [
+            {
+                **transaction.model_dump(exclude={'transaction_type'}),
+                'transaction_type_id': transaction_type_ids[
+                    transaction.transaction_type.value
+                ],
+                'date': now,
+            }
+            for transaction in transactions
+        ],
+    )
+    await update_daily_rollup(
+        daily_rollup_rows(
+            (
+                transaction.user_id,
+                now.date(),
+                transaction_type_ids[transaction.transaction_type.value],
+                transaction.amount,
+            )
+            for transaction in transactions
+        ),
+        session,
+    )
+    return list(transaction_ids)
 
 
-async def save_report(
-    report_in: TransactionReportSchema,
-    user_transactions: list[UserTransaction],
+async def resolve_transaction_type_ids(
+    type_names: set[str],
     session: AsyncSession,
-) -> None:
-    """Сохранение отчета о транзакциях."""
-    with global_tracer().start_active_span('save_report') as scope:
-        scope.span.set_tag('report_in', str(report_in))
-        report = await create_report(
-            report_in.user_id,
-            report_in.date_start,
-            report_in.date_end,
+    redis_client: RedisClient,
+) -> tuple[dict[str, int], dict[str, int]]:
+    """Получение id типов транзакций.
+
+    Возвращает id всех типов и отдельно id типов, найденных или созданных
+    запросом к БД, чтобы сохранить их в кеш после commit.
+    """
+    transaction_type_ids = {}
+    missing_type_names = []
+    for type_name in type_names:
+        type_id = await get_transaction_type_id(type_name, redis_client)
+        if type_id is None:
+            missing_type_names.append(type_name)
+        else:
+            transaction_type_ids[type_name] = type_id
+
+    created_type_ids = {}
+    if missing_type_names:
+        created_type_ids = await get_or_create_transaction_types(
+            missing_type_names,
             session,
         )
-
-        await create_report_transaction_relations(
-            report.id, user_transactions, session,
-        )
+        transaction_type_ids.update(created_type_ids)
+    return transaction_type_ids, created_type_ids
 
 
-async def get_user_transactions_in_period(
-    user_id: int,
-    date_start: datetime,
-    date_end: datetime,
+async def apply_user_transactions(
+    transactions: list[TransactionSchema],
     session: AsyncSession,
-) -> list[UserTransaction]:
-    """Получение списка транзакций за период."""
-    with global_tracer().start_active_span('get_user_transactions_in_period') as scope:  # noqa: E501
-        scope.span.set_tag('user_id', user_id)
-        transactions = await session.scalars(
-            select(UserTransaction)
-            .where(UserTransaction.user_id == user_id)
-            .where(UserTransaction.date.between(date_start, date_end)),
-        )
-
-        return list(transactions)
-
-
-async def get_trasactions_form_cache(
-    report: TransactionReportSchema,
     redis_client: RedisClient,
-) -> str | None:
-    """Поиск отчета о транзакциях."""
-    with global_tracer().start_active_span('get_trasactions_form_cache') as scope:  # noqa: E501
-        report_key = get_report_key(
-            report.user_id,
-            report.date_start,
-            report.date_end,
+) -> tuple[list[int], dict[str, int]]:
+    """Изменение балансов пользователей и создание пакета транзакций.
+
+    Возвращает id транзакций и id типов, созданных запросом к БД. Как и
+    в `create_transaction_view`, блокируются сначала строки
+    пользователей, затем типов транзакций и дневных сумм, чтобы
+    одиночное и пакетное создание транзакций не блокировали друг друга
+    взаимно.
+    """
+    await update_users_balances(transactions, session)
+    type_names = {
+        transaction.transaction_type.value for transaction in transactions
+    }
+    transaction_type_ids, created_type_ids = (
+        await resolve_transaction_type_ids(
+            type_names,
+            session,
+            redis_client,
         )
-
-        scope.span.set_tag('report_key', report_key)
-        return redis_client.get_report_transaction(report_key)
-
-
-async def save_report_cache(
-    report: TransactionReportSchema,
-    user_transactions: str,
+    )
+    transaction_ids = await create_user_transactions(
+        transactions,
+        transaction_type_ids,
+        session,
+    )
+    return transaction_ids, created_type_ids
+
+
+@traced()
+async def create_transactions_batch_view(
+    transactions: list[TransactionSchema],
+    session: AsyncSession,
     redis_client: RedisClient,
-) -> None:
-    """Сохранение отчета о транзакциях."""
-    with global_tracer().start_active_span('save_report_cache'):
-        report_key = get_report_key(
-            report.user_id, report.date_start, report.date_end,
+) -> list[int]:
+    """Пакетное создание транзакций в одной транзакции БД."""
+    tag_active_span('count', len(transactions))
+    if not transactions:
+        return []
+
+    transaction_ids, created_type_ids = await apply_user_transactions(
+        transactions,
+        session,
+        redis_client,
+    )
+    await session.commit()
+
+    await update_cache_after_commit(
+        {transaction.user_id for transaction in transactions},
+        created_type_ids,
+        redis_client,
+    )
+    return transaction_ids
+
+
+@traced()
+async def get_user_balance_view(
+    user_id: int,
+    session: AsyncSession,
+) -> UserBalanceSchema:
+    """Получение баланса пользователя по первичному ключу."""
+    balance = await session.scalar(
+        select(User.balance).where(User.id == user_id),
+    )
+    if balance is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='User not found',
         )
-
-        redis_client.set_report_transaction(report_key, user_transactions)
+    return UserBalanceSchema(user_id=user_id, balance=balance)
 
 
-async def get_transactions_view(
-    report: TransactionReportSchema,
+@traced('aggregate_report')
+async def get_daily_totals_view(
+    aggregate_report: TransactionAggregateReportSchema,
     session: AsyncSession,
-    redis_client: RedisClient,
-) -> list[TransactionOutSchema]:
-    """Получение списка транзакций."""
-    with global_tracer().start_active_span('get_transactions_view') as scope:
-        scope.span.set_tag('report', str(report))
-        cashed_transactions = await get_trasactions_form_cache(
-            report,
-            redis_client,
-        )
-        if cashed_transactions is not None:
-            loaded_transactions = json_nested_load(cashed_transactions)
-            scope.span.set_tag(
-                'cashed_transactions',
-                str(loaded_transactions),
-            )
-            return loaded_transactions
-
-        user_transactions_orm = await get_user_transactions_in_period(
-            report.user_id,
-            report.date_start,
-            report.date_end,
-            session,
+) -> list[UserDailyRollup]:
+    """Получение сумм транзакций пользователя по дням и типам транзакций.
+
+    Суммы читаются из дневной таблицы, поэтому стоимость запроса зависит
+    от числа дней в периоде, а не от числа транзакций.
+    """
+    daily_totals = await session.scalars(
+        select(UserDailyRollup)
+        .where(
+            UserDailyRollup.user_id == aggregate_report.user_id,
+            UserDailyRollup.day.between(
+                aggregate_report.date_start,
+                aggregate_report.date_end,
+            ),
         )
+        .order_by(
+            UserDailyRollup.day,
+            UserDailyRollup.transaction_type_id,
+        ),
+    )
 
-        await save_report(report, user_transactions_orm, session)
-        user_transactions_out = [
-            TransactionOutSchema.model_validate(transaction)
-            for transaction in user_transactions_orm
-        ]
-
-        scope.span.set_tag('user_transactions_out', str(user_transactions_out))
-
-        user_transaction_cashed = json_nested_dump(user_transactions_out)
-        await save_report_cache(report, user_transaction_cashed, redis_client)
-
-        return user_transactions_out
+    return list(daily_totals)
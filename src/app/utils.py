@@ -1,14 +1,168 @@
+import asyncio
+import base64
 import json  # noqa: WPS100
+from collections.abc import Awaitable, Callable, Sequence
+from datetime import datetime
+from functools import lru_cache
+from typing import Generic, TypeVar
 
+from pydantic import BaseModel, TypeAdapter
 
-def json_nested_load(seq: str) -> list:
+CACHE_FORMAT_WIRE = b'\x02'
+CACHE_FORMAT_PAGE = b'\x03'
+CACHE_PAGE_SEPARATOR = b'\n'
+
+FlightResult = TypeVar('FlightResult')
+
+
+def json_nested_load(seq: str | bytes) -> list:
     """Восстановление вложенной json структуры из строки."""
     first_level = json.loads(seq)
     second_level = [json.loads(model) for model in first_level]
     return second_level
 
 
-def json_nested_dump(seq: list) -> str:
+def json_nested_dump(seq: Sequence) -> str:
     """Запись вложенной json структуры в строку."""
     first_level = [model.model_dump_json() for model in seq]
     return json.dumps(first_level)
+
+
+@lru_cache
+def list_adapter(model: type[BaseModel]) -> TypeAdapter:
+    """Адаптер pydantic для списка моделей."""
+    return TypeAdapter(list[model])  # type: ignore
+
+
+def json_wire_dump(seq: Sequence[BaseModel]) -> bytes:
+    """Запись списка моделей в json в том же виде, что и ответ API."""
+    if not seq:
+        return b'[]'
+    return list_adapter(type(seq[0])).dump_json(seq)
+
+
+def ndjson_dump(seq: Sequence[BaseModel]) -> bytes:
+    """Запись списка моделей в NDJSON, по одной модели на строку."""
+    lines = [model.model_dump_json() for model in seq]
+    lines.append('')
+    return '\n'.join(lines).encode()
+
+
+def cache_dump(seq: Sequence[BaseModel]) -> bytes:
+    """Запись списка моделей в кеш в текущем формате."""
+    return CACHE_FORMAT_WIRE + json_wire_dump(seq)
+
+
+def cache_wire_payload(cached: str | bytes) -> bytes | None:
+    """Готовое тело ответа, если запись кеша хранится в формате ответа API."""
+    if isinstance(cached, str):
+        cached = cached.encode()
+    if cached.startswith(CACHE_FORMAT_WIRE):
+        return cached[len(CACHE_FORMAT_WIRE):]
+    return None
+
+
+cursor_adapter = TypeAdapter(tuple[datetime, int])
+
+
+def encode_cursor(date: datetime, transaction_id: int) -> str:
+    """Непрозрачный курсор страницы из ключа последней транзакции."""
+    position = cursor_adapter.dump_json((date, transaction_id))
+    return base64.urlsafe_b64encode(position).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Ключ последней транзакции страницы из курсора.
+
+    Поврежденный курсор приводит к ValueError.
+    """
+    return cursor_adapter.validate_json(base64.urlsafe_b64decode(cursor))
+
+
+def cache_page_dump(payload: bytes, next_cursor: str | None) -> bytes:
+    """Запись страницы отчета в кеш вместе с курсором следующей страницы.
+
+    Страница хранится в формате ответа API, курсор отделен переводом
+    строки, которого нет в base64.
+    """
+    cursor = (next_cursor or '').encode()
+    return b''.join((CACHE_FORMAT_PAGE, cursor, CACHE_PAGE_SEPARATOR, payload))
+
+
+def cache_page_load(cached: str | bytes) -> tuple[bytes, str | None] | None:
+    """Тело ответа и курсор следующей страницы из записи кеша страницы."""
+    if isinstance(cached, str):
+        cached = cached.encode()
+    if not cached.startswith(CACHE_FORMAT_PAGE):
+        return None
+    cursor, _, payload = cached[len(CACHE_FORMAT_PAGE):].partition(
+        CACHE_PAGE_SEPARATOR,
+    )
+    return payload, cursor.decode() or None
+
+
+def cache_load(cached: str | bytes) -> list:
+    """Чтение списка из кеша.
+
+    Формат определяется по первому байту. Записи без заголовка сохранены
+    json_nested_dump до появления версий формата.
+    """
+    if isinstance(cached, str):
+        cached = cached.encode()
+    if cached.startswith(CACHE_FORMAT_WIRE):
+        return json.loads(cached[len(CACHE_FORMAT_WIRE):])
+    return json_nested_load(cached)
+
+
+class SingleFlight(Generic[FlightResult]):
+    """Объединение одновременных одинаковых вызовов внутри процесса.
+
+    Первый вызов с ключом выполняет функцию, остальные вызовы с тем же
+    ключом ждут его результата или исключения, пока он не завершится.
+    """
+
+    def __init__(self) -> None:
+        self.flights: dict[str, asyncio.Future[FlightResult]] = {}
+
+    async def do(
+        self,
+        key: str,
+        func: Callable[..., Awaitable[FlightResult]],
+        *args,
+    ) -> FlightResult:
+        """Выполнение функции или ожидание уже идущего вызова с ключом.
+
+        Если ожидаемый вызов отменили, функция выполняется заново.
+        """
+        while key in self.flights:
+            flight = self.flights[key]
+            try:
+                return await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                if not flight.cancelled():
+                    raise
+        return await self.lead(key, func, *args)
+
+    async def lead(
+        self,
+        key: str,
+        func: Callable[..., Awaitable[FlightResult]],
+        *args,
+    ) -> FlightResult:
+        """Выполнение функции с передачей результата ожидающим вызовам."""
+        flight = asyncio.get_running_loop().create_future()
+        self.flights[key] = flight
+        try:
+            flight_result = await func(*args)
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except Exception as error:
+            flight.set_exception(error)
+            # Исключение получит и сам вызов, ожидающих может не быть
+            flight.exception()
+            raise
+        finally:
+            self.flights.pop(key)
+        flight.set_result(flight_result)
+        return flight_result
@@ -0,0 +1,106 @@
+"""Пропускная способность пакетного создания транзакций.
+
+Запуск (из каталога src, нужна БД из настроек с примененными миграциями):
+
+    python -m benchmarks.batch_insert --rows 5000 --batch-size 500
+
+Сравнивает создание транзакций по одной через `create_transaction_view`
+(один commit на строку) и пачками через `create_transactions_batch_view`.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from sqlalchemy import delete
+
+from app.db.db_helper import db_helper
+from app.db.models import User, UserDailyRollup, UserTransaction
+from app.transaction_service.schemas import (
+    TransactionSchema,
+    TransactionTypeSchema,
+)
+from app.transaction_service.views import (
+    create_transaction_view,
+    create_transactions_batch_view,
+)
+from benchmarks.fakes import FakeRedisClient
+
+
+def make_transactions(user_id: int, rows: int) -> list[TransactionSchema]:
+    """Синтетические транзакции пользователя."""
+    types = list(TransactionTypeSchema)
+    return [
+        TransactionSchema(
+            user_id=user_id,
+            amount=index,
+            transaction_type=types[index % len(types)],
+        )
+        for index in range(rows)
+    ]
+
+
+async def run_single(transactions: list[TransactionSchema]) -> float:
+    """Создание транзакций по одной, возвращает строк в секунду."""
+    redis_client = FakeRedisClient()
+    async with db_helper.session_factory() as session:
+        started = time.perf_counter()
+        for transaction in transactions:
+            await create_transaction_view(transaction, session, redis_client)
+        elapsed = time.perf_counter() - started
+    return len(transactions) / elapsed
+
+
+async def run_batch(
+    transactions: list[TransactionSchema],
+    batch_size: int,
+) -> float:
+    """Создание транзакций пачками, возвращает строк в секунду."""
+    redis_client = FakeRedisClient()
+    async with db_helper.session_factory() as session:
+        started = time.perf_counter()
+        for offset in range(0, len(transactions), batch_size):
+            await create_transactions_batch_view(
+                transactions[offset:offset + batch_size],
+                session,
+                redis_client,
+            )
+        elapsed = time.perf_counter() - started
+    return len(transactions) / elapsed
+
+
+async def main(rows: int, batch_size: int) -> None:
+    """Запуск сравнения."""
+    async with db_helper.session_factory() as session:
+        user = User(name=f'benchmark-{time.time_ns()}', password=b'')
+        session.add(user)
+        await session.commit()
+
+    transactions = make_transactions(user.id, rows)
+    results = {
+        'rows': rows,
+        'batch_size': batch_size,
+        'single_rows_per_sec': await run_single(transactions),
+        'batch_rows_per_sec': await run_batch(transactions, batch_size),
+    }
+
+    async with db_helper.session_factory() as session:
+        await session.execute(
+            delete(UserTransaction).where(UserTransaction.user_id == user.id),
+        )
+        await session.execute(
+            delete(UserDailyRollup).where(UserDailyRollup.user_id == user.id),
+        )
+        await session.delete(user)
+        await session.commit()
+    await db_helper.engine.dispose()
+
+    print(json.dumps(results, indent=2))  # noqa: WPS421
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.batch_size))
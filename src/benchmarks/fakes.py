@@ -0,0 +1,154 @@
+import asyncio
+from datetime import datetime
+from itertools import count
+from types import SimpleNamespace
+
+from sqlalchemy import Insert, Select, Update
+
+from app.db.models import TransactionReport, UserTransaction
+from app.external.redis_client import RedisClient
+
+
+class FakeRedisClient(RedisClient):
+    """RedisClient, хранящий данные в памяти процесса."""
+
+    def __init__(self) -> None:
+        self.storage: dict[str, bytes] = {}
+
+    async def close(self):
+        """Закрывать нечего."""
+
+    async def set(self, key, value, ttl: float | None = None):
+        """Установка значения по ключу, время жизни не учитывается."""
+        if not isinstance(value, bytes):
+            value = str(value).encode()
+        self.storage[key] = value
+
+    async def set_nx(self, key, value, ttl_ms: int) -> bool:
+        """Установка значения, только если ключа нет."""
+        if key in self.storage:
+            return False
+        await self.set(key, value)
+        return True
+
+    async def delete(self, key) -> None:
+        """Удаление значения по ключу."""
+        self.storage.pop(key, None)
+
+    async def delete_if_equal(self, key, value) -> bool:
+        """Удаление ключа, если в нем лежит значение `value`."""
+        if self.storage.get(key) != str(value).encode():
+            return False
+        await self.delete(key)
+        return True
+
+    async def get(self, key):
+        """Получение значения по ключу."""
+        return self.storage.get(key)
+
+    async def get_many(self, *keys) -> list:
+        """Получение значений нескольких ключей."""
+        return [self.storage.get(key) for key in keys]
+
+    async def incr(self, key) -> int:
+        """Увеличение значения по ключу."""
+        value = int(self.storage.get(key, b'0')) + 1
+        self.storage[key] = str(value).encode()
+        return value
+
+
+class FakeResult:
+    """Результат запроса FakeSession."""
+
+    def __init__(self, rows: list) -> None:
+        self.rows = rows
+
+    def one(self):
+        """Единственная строка результата."""
+        return self.rows[0]
+
+    def scalar_one(self):
+        """Единственное значение результата."""
+        return self.rows[0]
+
+    def __iter__(self):
+        """Перебор строк результата."""
+        return iter(self.rows)
+
+
+class FakeSession:  # noqa: WPS214
+    """Замена AsyncSession без БД для замеров кода сервиса.
+
+    SQL не выполняется: запросы различаются по типу, на каждый
+    возвращается заранее подготовленный результат. `latency` имитирует
+    сетевую задержку одного обращения к БД.
+    """
+
+    def __init__(
+        self,
+        transactions: list[UserTransaction],
+        latency: float = 0,
+    ) -> None:
+        self.transactions = transactions
+        self.latency = latency
+        self.ids = count(1)
+        self.added: list = []
+
+    async def round_trip(self) -> None:
+        """Ожидание ответа БД."""
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def execute(self, statement, params=None) -> FakeResult:
+        """Выполнение запроса.
+
+        INSERT транзакции возвращает новую строку, INSERT отчета - его id.
+        """
+        await self.round_trip()
+        if not isinstance(statement, Insert):
+            return FakeResult([])
+        if statement.entity_description['entity'] is TransactionReport:
+            return FakeResult([next(self.ids)])
+        if statement.entity_description['entity'] is UserTransaction:
+            return FakeResult([
+                SimpleNamespace(
+                    id=next(self.ids),
+                    transaction_type_id=1,
+                    date=datetime.now(),
+                ),
+            ])
+        return FakeResult([])
+
+    async def scalar(self, statement) -> int | None:
+        """Баланс пользователя для UPDATE ... RETURNING и SELECT."""
+        await self.round_trip()
+        if isinstance(statement, (Select, Update)):
+            return 0
+        return None
+
+    async def scalars(self, statement) -> FakeResult:
+        """Транзакции отчета."""
+        await self.round_trip()
+        return FakeResult(self.transactions)
+
+    def add(self, instance) -> None:
+        """Добавление объекта до flush."""
+        self.added.append(instance)
+
+    async def flush(self) -> None:
+        """Выдача id добавленным объектам."""
+        await self.round_trip()
+        for instance in self.added:
+            instance.id = next(self.ids)
+        self.added.clear()
+
+    async def commit(self) -> None:
+        """Фиксация транзакции."""
+        await self.flush()
+
+    async def rollback(self) -> None:
+        """Откат транзакции."""
+        self.added.clear()
+
+    async def close(self) -> None:
+        """Закрывать нечего."""
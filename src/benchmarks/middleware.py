@@ -0,0 +1,121 @@
+"""Пропускная способность создания транзакций с разными middleware.
+
+Запуск (из каталога src, нужна БД из настроек с примененными миграциями):
+
+    python -m benchmarks.middleware --requests 2000 --concurrency 50
+
+Сравнивает запросы к `/api/transactions/create/` без middleware, с
+пустым `BaseHTTPMiddleware` (накладные расходы прежней трассировки без
+самой трассировки) и с `TracingMiddleware`. Запросы распределяются по
+`concurrency` пользователям, чтобы не ждать блокировку строки баланса.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import delete
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.db.db_helper import db_helper
+from app.db.models import User, UserDailyRollup, UserTransaction
+from app.external.redis_client import get_redis_client
+from app.middleware import TracingMiddleware
+from app.transaction_service.schemas import TransactionTypeSchema
+from app.transaction_service.urls import router as transactions_router
+from benchmarks.fakes import FakeRedisClient
+from benchmarks.utils import summary
+
+
+async def pass_through(request, call_next):
+    """Dispatch, который только передает запрос дальше."""
+    return await call_next(request)
+
+
+def make_app(middleware: str) -> FastAPI:
+    """Приложение с роутером транзакций и выбранным middleware."""
+    app = FastAPI()
+    app.include_router(transactions_router, prefix='/api')
+    redis_client = FakeRedisClient()
+    app.dependency_overrides[get_redis_client] = lambda: redis_client
+    if middleware == 'base_http':
+        app.add_middleware(BaseHTTPMiddleware, dispatch=pass_through)
+    elif middleware == 'asgi':
+        app.add_middleware(TracingMiddleware)
+    return app
+
+
+async def run(
+    middleware: str,
+    user_ids: list[int],
+    requests: int,
+) -> dict:
+    """Создание транзакций через API, возвращает запросов в секунду."""
+    client = AsyncClient(
+        transport=ASGITransport(app=make_app(middleware)),
+        base_url='http://benchmark',
+    )
+    semaphore = asyncio.Semaphore(len(user_ids))
+    latencies: list[float] = []
+
+    async def request(user_id: int):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post(
+                '/api/transactions/create/',
+                json={
+                    'user_id': user_id,
+                    'amount': 1,
+                    'transaction_type': TransactionTypeSchema.DEPOSIT.value,
+                },
+            )
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        request(user_ids[index % len(user_ids)]) for index in range(requests)
+    ))
+    elapsed = time.perf_counter() - started
+    await client.aclose()
+    return {'requests_per_sec': requests / elapsed, **summary(latencies)}
+
+
+async def main(requests: int, concurrency: int) -> None:
+    """Запуск сравнения."""
+    async with db_helper.session_factory() as session:
+        users = [
+            User(name=f'benchmark-{time.time_ns()}-{index}', password=b'')
+            for index in range(concurrency)
+        ]
+        session.add_all(users)
+        await session.commit()
+    user_ids = [user.id for user in users]
+
+    results = {
+        'requests': requests,
+        'concurrency': concurrency,
+    }
+    for middleware in ('none', 'base_http', 'asgi'):
+        results[middleware] = await run(middleware, user_ids, requests)
+
+    async with db_helper.session_factory() as session:
+        for model in (UserTransaction, UserDailyRollup):
+            await session.execute(
+                delete(model).where(model.user_id.in_(user_ids)),
+            )
+        await session.execute(delete(User).where(User.id.in_(user_ids)))
+        await session.commit()
+    await db_helper.engine.dispose()
+
+    print(json.dumps(results, indent=2))  # noqa: WPS421
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -0,0 +1,191 @@
+"""Задержка запроса отчета при росте истории секционированной таблицы.
+
+Запуск (из каталога src, только на отдельной БД для бенчмарков, нужны
+примененные миграции):
+
+    python -m benchmarks.partitions --rows 100000000 --steps 4
+
+История растет шагами по году в прошлое, на каждом шаге загружается
+rows / steps транзакций и замеряется `get_user_transactions_in_period`
+за 30 дней последнего года. При отсечении секций задержка не должна
+зависеть от размера истории. Секции, созданные бенчмарком, удаляются.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import delete, select, text
+
+from app.config import settings
+from app.db.db_helper import db_helper
+from app.db.models import User, UserDailyRollup, UserTransaction
+from app.db.partitions import (
+    add_months,
+    create_partition,
+    partition_name,
+    qualified_name,
+)
+from app.transaction_service.reports import get_user_transactions_in_period
+from app.transaction_service.transaction_types import (
+    load_transaction_type_registry,
+)
+from app.transaction_service.type_registry import transaction_type_registry
+from benchmarks.utils import summary
+
+HISTORY_END = date(2026, 1, 1)
+REPORT_DAYS = 30
+PARTITION_PATTERN = re.compile(
+    rf'{UserTransaction.__tablename__}_(?:p\d{{4}}_\d{{2}}|default)',
+)
+
+LOAD_USERS = text(
+    f"""
+    INSERT INTO {settings.db_schema}.lebedev_user
+        (name, password, balance, is_verified)
+    SELECT :prefix || n, '', 0, false
+    FROM generate_series(1, :users) AS n
+    RETURNING id
+    """,  # noqa: S608
+)
+
+LOAD_MONTH = text(
+    f"""
+    INSERT INTO {settings.db_schema}.lebedev_user_transaction
+        (user_id, amount, transaction_type_id, date)
+    SELECT
+        (CAST(:user_ids AS bigint[]))[1 + (n % :users)],
+        (random() * 1000)::bigint,
+        :type_id,
+        CAST(:start AS timestamp)
+            + random() * (CAST(:end AS timestamp) - CAST(:start AS timestamp))
+    FROM generate_series(1, :rows) AS n
+    """,  # noqa: S608
+)
+
+
+async def load_users(users: int) -> list[int]:
+    """Загрузка синтетических пользователей."""
+    async with db_helper.session_factory() as session:
+        await load_transaction_type_registry(session)
+        user_ids = list(await session.scalars(
+            LOAD_USERS,
+            {'prefix': f'benchmark-{time.time_ns()}-', 'users': users},
+        ))
+        await session.commit()
+    return user_ids
+
+
+async def load_year(
+    user_ids: list[int],
+    year_start: date,
+    rows: int,
+    created: list[str],
+) -> None:
+    """Создание секций года и загрузка в них rows транзакций."""
+    for offset in range(12):  # noqa: WPS432
+        month = add_months(year_start, offset)
+        async with db_helper.engine.begin() as conn:
+            if await create_partition(conn, month):
+                created.append(partition_name(month))
+            await conn.execute(
+                LOAD_MONTH,
+                {
+                    'user_ids': user_ids,
+                    'users': len(user_ids),
+                    'type_id': transaction_type_registry.get('Пополнение'),
+                    'start': month,
+                    'end': add_months(month, 1),
+                    'rows': rows // 12,  # noqa: WPS432
+                },
+            )
+    async with db_helper.engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level='AUTOCOMMIT')
+        await conn.execute(text(
+            f'ANALYZE {qualified_name(UserTransaction.__tablename__)}',
+        ))
+
+
+def random_period() -> tuple[datetime, datetime]:
+    """Случайный период отчета внутри последнего года истории."""
+    offset = random.randint(REPORT_DAYS, 365)  # noqa: S311, WPS432
+    date_end = datetime.combine(HISTORY_END, datetime.min.time())
+    date_start = date_end - timedelta(days=offset)
+    return date_start, date_start + timedelta(days=REPORT_DAYS)
+
+
+async def measure(user_ids: list[int], queries: int) -> dict:
+    """Замер задержки запроса отчета и числа читаемых секций."""
+    latencies = []
+    async with db_helper.session_factory() as session:
+        for _ in range(queries):
+            user_id = random.choice(user_ids)  # noqa: S311
+            date_start, date_end = random_period()
+            started = time.perf_counter()
+            await get_user_transactions_in_period(
+                user_id, date_start, date_end, session,
+            )
+            latencies.append(time.perf_counter() - started)
+
+        date_start, date_end = random_period()
+        query = (
+            select(UserTransaction)
+            .where(UserTransaction.user_id == user_ids[0])
+            .where(UserTransaction.date.between(date_start, date_end))
+        )
+        compiled = query.compile(
+            db_helper.engine,
+            compile_kwargs={'literal_binds': True},
+        )
+        plan = list(await session.scalars(text(f'EXPLAIN {compiled}')))
+    scanned = set(PARTITION_PATTERN.findall('\n'.join(plan)))
+    return {'latency': summary(latencies), 'partitions_scanned': len(scanned)}
+
+
+async def cleanup(user_ids: list[int], created: list[str]) -> None:
+    """Удаление синтетических данных и созданных секций."""
+    async with db_helper.session_factory() as session:
+        for model in (UserTransaction, UserDailyRollup):
+            await session.execute(
+                delete(model).where(model.user_id.in_(user_ids)),
+            )
+        await session.execute(delete(User).where(User.id.in_(user_ids)))
+        for partition in created:
+            await session.execute(
+                text(f'DROP TABLE {qualified_name(partition)}'),
+            )
+        await session.commit()
+
+
+async def main(rows: int, steps: int, users: int, queries: int) -> None:
+    """Запуск замеров по мере роста истории."""
+    user_ids = await load_users(users)
+    created: list[str] = []
+    results = []
+    try:
+        for step in range(steps):
+            year_start = date(HISTORY_END.year - step - 1, 1, 1)
+            await load_year(user_ids, year_start, rows // steps, created)
+            results.append({
+                'history_rows': rows // steps * (step + 1),
+                'history_years': step + 1,
+                **await measure(user_ids, queries),
+            })
+    finally:
+        await cleanup(user_ids, created)
+        await db_helper.engine.dispose()
+
+    print(json.dumps(results, indent=2))  # noqa: WPS421
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100000000)
+    parser.add_argument('--steps', type=int, default=4)
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.steps, args.users, args.queries))
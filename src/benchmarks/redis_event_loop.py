@@ -0,0 +1,92 @@
+"""Задержка event loop при конкурентных чтениях отчетов из Redis.
+
+Запуск (из каталога src, нужен доступный Redis из настроек):
+
+    python -m benchmarks.redis_event_loop --requests 2000 --concurrency 100
+
+Сравнивает синхронный клиент `redis.Redis`, вызываемый из корутин
+(поведение до перехода на asyncio), и текущий `RedisClient`.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import redis
+
+from app.config import settings
+from app.external.redis_client import RedisClient
+from benchmarks.utils import loop_lag_monitor, summary
+
+REPORT_KEY = 'benchmark'
+PAYLOAD_SIZE = 64 * 1024
+
+
+async def run_sync(requests: int, concurrency: int) -> dict:
+    """Чтения синхронным клиентом внутри корутин."""
+    client = redis.Redis(
+        host=settings.redis_host,
+        port=settings.redis_port,
+        db=settings.redis_db_number,
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def request():
+        async with semaphore:
+            started = time.perf_counter()
+            client.get(f'report:{REPORT_KEY}')
+            latencies.append(time.perf_counter() - started)
+            await asyncio.sleep(0)
+
+    async with loop_lag_monitor() as lags:
+        await asyncio.gather(*(request() for _ in range(requests)))
+    client.close()
+    return {'requests': summary(latencies), 'loop_lag': summary(lags)}
+
+
+async def run_async(requests: int, concurrency: int) -> dict:
+    """Чтения асинхронным RedisClient."""
+    client = RedisClient(
+        settings.redis_host,
+        settings.redis_port,
+        settings.redis_db_number,
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def request():
+        async with semaphore:
+            started = time.perf_counter()
+            await client.get_report_transaction(REPORT_KEY)
+            latencies.append(time.perf_counter() - started)
+
+    async with loop_lag_monitor() as lags:
+        await asyncio.gather(*(request() for _ in range(requests)))
+    await client.close()
+    return {'requests': summary(latencies), 'loop_lag': summary(lags)}
+
+
+async def main(requests: int, concurrency: int) -> None:
+    """Запуск сравнения."""
+    client = RedisClient(
+        settings.redis_host,
+        settings.redis_port,
+        settings.redis_db_number,
+    )
+    await client.set_report_transaction(REPORT_KEY, 'x' * PAYLOAD_SIZE)
+    await client.close()
+
+    results = {
+        'sync': await run_sync(requests, concurrency),
+        'async': await run_async(requests, concurrency),
+    }
+    print(json.dumps(results, indent=2))  # noqa: WPS421
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
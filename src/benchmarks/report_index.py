@@ -0,0 +1,172 @@
+"""Задержка запроса отчета без индекса (user_id, date) и с ним.
+
+Запуск (из каталога src, только на отдельной БД для бенчмарков: скрипт
+удаляет и заново создает индекс ix_lebedev_user_transaction_user_id_date):
+
+    python -m benchmarks.report_index --users 1000 --rows-per-user 1000
+
+Загружает синтетические транзакции, затем замеряет
+`get_user_transactions_in_period` и печатает планы запросов.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select, text
+
+from app.config import settings
+from app.db.db_helper import db_helper
+from app.db.models import User, UserTransaction
+from app.transaction_service.reports import get_user_transactions_in_period
+from app.transaction_service.transaction_types import (
+    load_transaction_type_registry,
+)
+from app.transaction_service.type_registry import transaction_type_registry
+from benchmarks.utils import summary
+
+INDEX_NAME = 'ix_lebedev_user_transaction_user_id_date'
+HISTORY_START = datetime(2020, 1, 1)
+HISTORY_DAYS = 5 * 365
+REPORT_DAYS = 30
+
+LOAD_USERS = text(
+    f"""
+    INSERT INTO {settings.db_schema}.lebedev_user
+        (name, password, balance, is_verified)
+    SELECT :prefix || n, '', 0, false
+    FROM generate_series(1, :users) AS n
+    RETURNING id
+    """,  # noqa: S608
+)
+
+LOAD_TRANSACTIONS = text(
+    f"""
+    INSERT INTO {settings.db_schema}.lebedev_user_transaction
+        (user_id, amount, transaction_type_id, date)
+    SELECT
+        u.id,
+        (random() * 1000)::bigint,
+        :type_id,
+        CAST(:start AS timestamp)
+            + random() * make_interval(days => CAST(:days AS int))
+    FROM unnest(CAST(:user_ids AS bigint[])) AS u(id)
+    CROSS JOIN generate_series(1, :rows_per_user)
+    """,  # noqa: S608
+)
+
+
+async def load(users: int, rows_per_user: int) -> list[int]:
+    """Загрузка синтетических пользователей и транзакций."""
+    async with db_helper.session_factory() as session:
+        await load_transaction_type_registry(session)
+        user_ids = list(await session.scalars(
+            LOAD_USERS,
+            {'prefix': f'benchmark-{time.time_ns()}-', 'users': users},
+        ))
+        await session.execute(
+            LOAD_TRANSACTIONS,
+            {
+                'user_ids': user_ids,
+                'rows_per_user': rows_per_user,
+                'type_id': transaction_type_registry.get('Пополнение'),
+                'start': HISTORY_START,
+                'days': HISTORY_DAYS,
+            },
+        )
+        await session.commit()
+    return user_ids
+
+
+async def set_index(enabled: bool) -> None:
+    """Создание или удаление индекса и обновление статистики."""
+    async with db_helper.engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level='AUTOCOMMIT')
+        if enabled:
+            await conn.execute(text(
+                f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} '
+                + f'ON {settings.db_schema}.lebedev_user_transaction '
+                + '(user_id, date)',
+            ))
+        else:
+            await conn.execute(text(
+                f'DROP INDEX IF EXISTS {settings.db_schema}.{INDEX_NAME}',
+            ))
+        await conn.execute(text(
+            f'ANALYZE {settings.db_schema}.lebedev_user_transaction',
+        ))
+
+
+def random_period() -> tuple[datetime, datetime]:
+    """Случайный период отчета внутри истории."""
+    offset = random.randint(0, HISTORY_DAYS - REPORT_DAYS)  # noqa: S311
+    date_start = HISTORY_START + timedelta(days=offset)
+    return date_start, date_start + timedelta(days=REPORT_DAYS)
+
+
+async def measure(user_ids: list[int], queries: int) -> dict:
+    """Замер задержки запроса отчета и его плана."""
+    latencies = []
+    async with db_helper.session_factory() as session:
+        for _ in range(queries):
+            user_id = random.choice(user_ids)  # noqa: S311
+            date_start, date_end = random_period()
+            started = time.perf_counter()
+            await get_user_transactions_in_period(
+                user_id, date_start, date_end, session,
+            )
+            latencies.append(time.perf_counter() - started)
+
+        date_start, date_end = random_period()
+        query = (
+            select(UserTransaction)
+            .where(UserTransaction.user_id == user_ids[0])
+            .where(UserTransaction.date.between(date_start, date_end))
+        )
+        compiled = query.compile(
+            db_helper.engine,
+            compile_kwargs={'literal_binds': True},
+        )
+        plan = await session.scalars(text(f'EXPLAIN ANALYZE {compiled}'))
+    return {'latency': summary(latencies), 'plan': list(plan)}
+
+
+async def cleanup(user_ids: list[int]) -> None:
+    """Удаление синтетических данных."""
+    async with db_helper.session_factory() as session:
+        await session.execute(
+            delete(UserTransaction).where(UserTransaction.user_id.in_(user_ids)),
+        )
+        await session.execute(delete(User).where(User.id.in_(user_ids)))
+        await session.commit()
+
+
+async def main(users: int, rows_per_user: int, queries: int) -> None:
+    """Запуск сравнения."""
+    user_ids = await load(users, rows_per_user)
+    try:
+        await set_index(enabled=False)
+        before = await measure(user_ids, queries)
+        await set_index(enabled=True)
+        after = await measure(user_ids, queries)
+    finally:
+        await cleanup(user_ids)
+        await db_helper.engine.dispose()
+
+    results = {
+        'rows': users * rows_per_user,
+        'without_index': before,
+        'with_index': after,
+    }
+    print(json.dumps(results, indent=2))  # noqa: WPS421
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--rows-per-user', type=int, default=1000)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.rows_per_user, args.queries))
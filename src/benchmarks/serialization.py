@@ -0,0 +1,77 @@
+"""Размер и скорость форматов кеша отчетов.
+
+Запуск (из каталога src, внешние сервисы не нужны):
+
+    python -m benchmarks.serialization --rows 1000 10000 100000
+
+Сравнивает исходный вложенный json и формат ответа API.
+"""
+import argparse
+import json
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta
+
+from app.transaction_service.schemas import TransactionOutSchema
+from app.utils import (
+    cache_dump,
+    cache_wire_payload,
+    json_nested_dump,
+    json_nested_load,
+)
+
+# Для формата ответа API чтение при попадании в кеш - только отрезание
+# заголовка, тело ответа отдается как есть.
+FORMATS = {
+    'nested': (json_nested_dump, json_nested_load),
+    'wire': (cache_dump, cache_wire_payload),
+}
+
+
+def make_transactions(rows: int) -> list[TransactionOutSchema]:
+    """Синтетический отчет."""
+    start = datetime(2024, 1, 1)
+    return [
+        TransactionOutSchema(
+            user_id=1,
+            amount=index * 7,
+            transaction_type_id=index % 2 + 1,
+            date=start + timedelta(minutes=index),
+        )
+        for index in range(rows)
+    ]
+
+
+def best_time(func: Callable, repeat: int) -> float:
+    """Лучшее время из нескольких запусков в миллисекундах."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def measure(rows: int, repeat: int) -> dict:
+    """Замер всех форматов на отчете из rows строк."""
+    transactions = make_transactions(rows)
+    results = {}
+    for name, (dump, load) in FORMATS.items():
+        cached = dump(transactions)
+        results[name] = {
+            'size_bytes': len(cached),
+            'dump_ms': best_time(lambda: dump(transactions), repeat),
+            'load_ms': best_time(lambda: load(cached), repeat),
+        }
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--rows', type=int, nargs='+', default=[1000, 10000, 100000],
+    )
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    report = {rows: measure(rows, args.repeat) for rows in args.rows}
+    print(json.dumps(report, indent=2))  # noqa: WPS421
@@ -0,0 +1,114 @@
+"""CPU на теги span при выдаче отчета.
+
+Запуск (из каталога src):
+
+    python -m benchmarks.span_tags --rows 10000 --repeat 50 --profile
+
+Сравнивает прежние теги (`str()` всего отчета) с числом строк и
+`set_bounded_tag` для выбранного и невыбранного span. Span пишутся в
+`InMemoryReporter`, поэтому стоимость отправки по UDP не учитывается.
+С `--profile` печатает профиль cProfile каждого варианта.
+"""
+import argparse
+import cProfile
+import io
+import json
+import pstats
+import time
+from contextlib import nullcontext
+from datetime import datetime
+
+from jaeger_client import Tracer
+from jaeger_client.reporter import InMemoryReporter
+from jaeger_client.sampler import ConstSampler
+
+from app.external.jaeger import set_bounded_tag
+from app.transaction_service.schemas import (
+    TransactionOutSchema,
+    TransactionReportSchema,
+)
+
+REPORT = TransactionReportSchema(
+    user_id=1,
+    date_start=datetime(2024, 1, 1),
+    date_end=datetime(2124, 1, 1),
+)
+
+
+def make_transactions(rows: int) -> list[TransactionOutSchema]:
+    """Синтетический отчет."""
+    return [
+        TransactionOutSchema(
+            user_id=1,
+            amount=index,
+            transaction_type_id=index % 2 + 1,
+            date=datetime(2024, 1, 1),
+        )
+        for index in range(rows)
+    ]
+
+
+def tag_full(tracer: Tracer, transactions: list) -> None:
+    """Теги до изменения: отчет целиком строкой."""
+    with tracer.start_span('report') as span:
+        span.set_tag('report', str(REPORT))
+        span.set_tag('user_transactions_out', str(transactions))
+
+
+def tag_bounded(tracer: Tracer, transactions: list) -> None:
+    """Теги после изменения: число строк и обрезанный запрос."""
+    with tracer.start_span('report') as span:
+        set_bounded_tag(span, 'report', REPORT)
+        set_bounded_tag(
+            span,
+            'user_transactions_out_count',
+            len(transactions),
+        )
+
+
+def measure(
+    tag,
+    tracer: Tracer,
+    transactions: list,
+    repeat: int,
+    profile: bool,
+) -> float:
+    """Среднее время одного отчета в миллисекундах."""
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    with profiler if profile else nullcontext():
+        for _ in range(repeat):
+            tag(tracer, transactions)
+    elapsed = time.perf_counter() - started
+    if profile:
+        stream = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stream)
+        stats.sort_stats('cumulative').print_stats(8)
+        print(stream.getvalue())  # noqa: WPS421
+    return elapsed / repeat * 1000
+
+
+def main(rows: int, repeat: int, profile: bool) -> None:
+    """Запуск сравнения."""
+    transactions = make_transactions(rows)
+    sampled = Tracer('benchmark', InMemoryReporter(), ConstSampler(True))
+    not_sampled = Tracer('benchmark', InMemoryReporter(), ConstSampler(False))
+    results = {'rows': rows, 'repeat': repeat}
+    variants = (
+        ('full_sampled_ms', tag_full, sampled),
+        ('full_not_sampled_ms', tag_full, not_sampled),
+        ('bounded_sampled_ms', tag_bounded, sampled),
+        ('bounded_not_sampled_ms', tag_bounded, not_sampled),
+    )
+    for name, tag, tracer in variants:
+        results[name] = measure(tag, tracer, transactions, repeat, profile)
+    print(json.dumps(results, indent=2))  # noqa: WPS421
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--profile', action='store_true')
+    args = parser.parse_args()
+    main(args.rows, args.repeat, args.profile)
@@ -0,0 +1,357 @@
+"""Набор замеров сервиса без внешних сервисов.
+
+Запуск (из каталога src):
+
+    python -m benchmarks.suite --concurrency 1 10 50 \
+        --label $(git rev-parse --short HEAD) --output results.json
+
+Redis заменяется `FakeRedisClient`, БД - `FakeSession`, поэтому замеряется
+только код сервиса: view, сериализация и маршруты через ASGI клиент.
+Задержку БД можно имитировать параметром `--db-latency`. Для каждого
+сценария записываются запросов в секунду, p50/p99 и пик выделенной
+памяти. С `--baseline` результаты сравниваются с прошлым запуском.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+
+from httpx import ASGITransport, AsyncClient
+
+from app.db.db_helper import db_helper
+from app.db.models import UserTransaction
+from app.external.redis_client import get_redis_client
+from app.main import app
+from app.transaction_service.report_views import get_transactions_view
+from app.transaction_service.schemas import (
+    TransactionOutSchema,
+    TransactionReportSchema,
+    TransactionSchema,
+    TransactionTypeSchema,
+)
+from app.transaction_service.type_registry import transaction_type_registry
+from app.transaction_service.views import create_transaction_view
+from app.utils import (
+    cache_dump,
+    cache_load,
+    cache_page_dump,
+    cache_page_load,
+    cache_wire_payload,
+    encode_cursor,
+    json_nested_dump,
+    json_nested_load,
+)
+from benchmarks.fakes import FakeRedisClient, FakeSession
+from benchmarks.utils import summary
+
+Operation = Callable[[int], Awaitable]
+
+USERS = 100
+REPORT_START = datetime(2024, 1, 1)
+
+
+class BenchmarkContext:
+    """Общие для сценариев фейки и данные."""
+
+    def __init__(self, rows: int, db_latency: float) -> None:
+        self.transactions = [
+            UserTransaction(
+                id=index,
+                user_id=1,
+                amount=index * 7,
+                transaction_type_id=index % 2 + 1,
+                date=REPORT_START + timedelta(minutes=index),
+            )
+            for index in range(rows)
+        ]
+        self.transactions_out = [
+            TransactionOutSchema.model_validate(transaction)
+            for transaction in self.transactions
+        ]
+        self.redis_client = FakeRedisClient()
+        self.session = FakeSession(self.transactions, db_latency)
+
+    def report(self, index: int = 0) -> TransactionReportSchema:
+        """Отчет, у которого ключ кеша зависит от index."""
+        return TransactionReportSchema(
+            user_id=1,
+            date_start=REPORT_START,
+            date_end=REPORT_START + timedelta(days=365, seconds=index),
+        )
+
+
+def transaction(index: int) -> TransactionSchema:
+    """Транзакция одного из USERS пользователей."""
+    return TransactionSchema(
+        user_id=index % USERS + 1,
+        amount=1,
+        transaction_type=TransactionTypeSchema.DEPOSIT,
+    )
+
+
+async def view_create_transaction(context: BenchmarkContext) -> Operation:
+    """Создание транзакции через view."""
+    async def operation(index: int):
+        await create_transaction_view(
+            transaction(index),
+            context.session,
+            context.redis_client,
+        )
+    return operation
+
+
+async def view_report_hit(context: BenchmarkContext) -> Operation:
+    """Отчет из кеша через view."""
+    report = context.report()
+    await get_transactions_view(report, context.session, context.redis_client)
+
+    async def operation(index: int):
+        await get_transactions_view(
+            report,
+            context.session,
+            context.redis_client,
+        )
+    return operation
+
+
+async def view_report_miss(context: BenchmarkContext) -> Operation:
+    """Построение отчета через view, каждый запрос - промах кеша."""
+    async def operation(index: int):
+        await get_transactions_view(
+            context.report(index),
+            context.session,
+            context.redis_client,
+        )
+    return operation
+
+
+async def http_client(context: BenchmarkContext) -> AsyncClient:
+    """ASGI клиент приложения с фейками вместо Redis и БД."""
+    app.dependency_overrides[get_redis_client] = lambda: context.redis_client
+    app.dependency_overrides[db_helper.scoped_session_dependency] = (
+        lambda: context.session
+    )
+    return AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url='http://benchmark',
+    )
+
+
+async def http_create_transaction(context: BenchmarkContext) -> Operation:
+    """POST /api/transactions/create/."""
+    client = await http_client(context)
+
+    async def operation(index: int):
+        response = await client.post(
+            '/api/transactions/create/',
+            json=transaction(index).model_dump(mode='json'),
+        )
+        response.raise_for_status()
+    return operation
+
+
+async def http_report(context: BenchmarkContext) -> Operation:
+    """POST /api/transactions/report/ с попаданием в кеш."""
+    client = await http_client(context)
+    report = context.report().model_dump(mode='json')
+
+    async def operation(index: int):
+        response = await client.post('/api/transactions/report/', json=report)
+        response.raise_for_status()
+    return operation
+
+
+async def http_balance(context: BenchmarkContext) -> Operation:
+    """GET /api/transactions/balance/{user_id}/."""
+    client = await http_client(context)
+
+    async def operation(index: int):
+        response = await client.get(
+            f'/api/transactions/balance/{index % USERS + 1}/',
+        )
+        response.raise_for_status()
+    return operation
+
+
+async def json_nested_dump_report(context: BenchmarkContext) -> Operation:
+    """Запись отчета во вложенный json."""
+    async def operation(index: int):
+        json_nested_dump(context.transactions_out)
+    return operation
+
+
+async def json_nested_load_report(context: BenchmarkContext) -> Operation:
+    """Чтение отчета из вложенного json."""
+    dumped = json_nested_dump(context.transactions_out)
+
+    async def operation(index: int):
+        json_nested_load(dumped)
+    return operation
+
+
+async def cache_dump_report(context: BenchmarkContext) -> Operation:
+    """Запись отчета в кеш в текущем формате."""
+    async def operation(index: int):
+        cache_dump(context.transactions_out)
+    return operation
+
+
+async def cache_wire_payload_report(context: BenchmarkContext) -> Operation:
+    """Тело ответа из записи кеша при попадании."""
+    cached = cache_dump(context.transactions_out)
+
+    async def operation(index: int):
+        cache_wire_payload(cached)
+    return operation
+
+
+async def cache_load_report(context: BenchmarkContext) -> Operation:
+    """Чтение отчета из записи кеша в список словарей."""
+    cached = cache_dump(context.transactions_out)
+
+    async def operation(index: int):
+        cache_load(cached)
+    return operation
+
+
+async def cache_page_load_report(context: BenchmarkContext) -> Operation:
+    """Тело ответа и курсор из записи кеша страницы."""
+    last = context.transactions[-1]
+    cached = cache_page_dump(
+        cache_wire_payload(cache_dump(context.transactions_out)) or b'',
+        encode_cursor(last.date, last.id),
+    )
+
+    async def operation(index: int):
+        cache_page_load(cached)
+    return operation
+
+
+SCENARIOS: dict[str, Callable[[BenchmarkContext], Awaitable[Operation]]] = {
+    'view_create_transaction': view_create_transaction,
+    'view_report_hit': view_report_hit,
+    'view_report_miss': view_report_miss,
+    'http_create_transaction': http_create_transaction,
+    'http_report': http_report,
+    'http_balance': http_balance,
+    'json_nested_dump': json_nested_dump_report,
+    'json_nested_load': json_nested_load_report,
+    'cache_dump': cache_dump_report,
+    'cache_wire_payload': cache_wire_payload_report,
+    'cache_load': cache_load_report,
+    'cache_page_load': cache_page_load_report,
+}
+
+
+async def run_concurrent(
+    operation: Operation,
+    requests: int,
+    concurrency: int,
+) -> dict:
+    """Выполнение requests операций в concurrency задач."""
+    latencies: list[float] = []
+    indexes = iter(range(requests))
+
+    async def worker():
+        for index in indexes:
+            started = time.perf_counter()
+            await operation(index)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {'ops_per_sec': requests / elapsed, **summary(latencies)}
+
+
+async def measure(
+    scenario: str,
+    context: BenchmarkContext,
+    requests: int,
+    concurrency: int,
+) -> dict:
+    """Замер сценария: время без трассировки памяти, затем пик памяти."""
+    operation = await SCENARIOS[scenario](context)
+    timings = await run_concurrent(operation, requests, concurrency)
+    tracemalloc.start()
+    await run_concurrent(operation, requests, concurrency)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        **timings,
+        'alloc_peak_kib': peak / 1024,
+        'alloc_retained_kib': current / 1024,
+    }
+
+
+def compare(results: dict, baseline: dict) -> dict:
+    """Изменение пропускной способности и p99 относительно baseline."""
+    changes = {}
+    for name, measured in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        changes[name] = {
+            'ops_per_sec_change': (
+                measured['ops_per_sec'] / previous['ops_per_sec'] - 1
+            ),
+            'p99_ms_change': (
+                measured['p99_ms'] / previous['p99_ms'] - 1
+                if previous['p99_ms'] else 0
+            ),
+        }
+    return changes
+
+
+async def main(args: argparse.Namespace) -> dict:
+    """Запуск выбранных сценариев на каждом уровне конкурентности."""
+    for type_id, type_schema in enumerate(TransactionTypeSchema, start=1):
+        transaction_type_registry.update({type_schema.value: type_id})
+    results = {}
+    for scenario in args.scenarios:
+        for concurrency in args.concurrency:
+            context = BenchmarkContext(args.rows, args.db_latency)
+            results[f'{scenario}@{concurrency}'] = await measure(
+                scenario,
+                context,
+                args.requests,
+                concurrency,
+            )
+    return {
+        'meta': {
+            'label': args.label,
+            'python': platform.python_version(),
+            'created_at': datetime.now().isoformat(),
+            'requests': args.requests,
+            'rows': args.rows,
+            'db_latency': args.db_latency,
+        },
+        'results': results,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS),
+    )
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 50])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--db-latency', type=float, default=0)
+    parser.add_argument('--label', default='')
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline')
+    args = parser.parse_args()
+    report = asyncio.run(main(args))
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        report['changes'] = compare(report['results'], baseline['results'])
+    with open(args.output, 'w') as output_file:
+        json.dump(report, output_file, indent=2)
+    print(json.dumps(report.get('changes', report['results']), indent=2))  # noqa: WPS421, E501
@@ -0,0 +1,44 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+
+def percentile(samples: list[float], percent: float) -> float:
+    """Перцентиль по отсортированной выборке."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(len(ordered) * percent / 100))
+    return ordered[index]
+
+
+def summary(samples: list[float]) -> dict[str, float]:
+    """Сводка по выборке задержек в миллисекундах."""
+    return {
+        'count': len(samples),
+        'p50_ms': percentile(samples, 50) * 1000,
+        'p99_ms': percentile(samples, 99) * 1000,
+        'max_ms': max(samples, default=0.0) * 1000,
+    }
+
+
+@asynccontextmanager
+async def loop_lag_monitor(interval: float = 0.001):
+    """Замер задержки event loop во время выполнения блока.
+
+    Фоновая задача засыпает на `interval` и записывает, насколько позже
+    она проснулась. Любой блокирующий вызов в loop увеличивает задержку.
+    """
+    lags: list[float] = []
+
+    async def tick():
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            lags.append(time.perf_counter() - started - interval)
+
+    task = asyncio.create_task(tick())
+    try:
+        yield lags
+    finally:
+        task.cancel()
@@ -1,3 +1,4 @@
+import pytest
 import pytest_asyncio
 from httpx import AsyncClient
 
@@ -14,3 +15,11 @@ app.dependency_overrides[get_redis_client] = (
 async def ac():
     async with AsyncClient(app=app, base_url='http://test') as ac:
         yield ac
+
+
+@pytest.fixture
+def shared_redis_mock():
+    redis_mock = get_redis_mock()
+    app.dependency_overrides[get_redis_client] = lambda: redis_mock
+    yield redis_mock
+    app.dependency_overrides[get_redis_client] = get_redis_mock
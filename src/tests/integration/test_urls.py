@@ -1,9 +1,12 @@
-from datetime import datetime
+import json
+from datetime import date, datetime
 
 import pytest
 from fastapi import status
+from httpx import ASGITransport, AsyncClient
 
-from tests.crud_for_test import get_user_transactions
+from app.main import app
+from tests.crud_for_test import get_user_reports, get_user_transactions
 
 
 @pytest.mark.parametrize(
@@ -38,6 +41,60 @@ async def test_create_transaction(
     assert transaction.user_id == user.id
 
 
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('reset_db')
+async def test_create_transactions_batch(ac, user, db_helper):
+    response = await ac.post(
+        'api/transactions/batch/',
+        json=[
+            {
+                'user_id': user.id,
+                'amount': 100,
+                'transaction_type': 'Пополнение',
+            },
+            {
+                'user_id': user.id,
+                'amount': 300,
+                'transaction_type': 'Снятие',
+            },
+        ],
+    )
+
+    async with db_helper.session_factory() as session:
+        transactions = await get_user_transactions(user.id, session)
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert sorted(response.json()) == sorted(t.id for t in transactions)
+    assert len(transactions) == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('reset_db')
+async def test_create_transactions_batch_unknown_user(ac, user, db_helper):
+    response = await ac.post(
+        'api/transactions/batch/',
+        json=[
+            {
+                'user_id': user.id,
+                'amount': 100,
+                'transaction_type': 'Пополнение',
+            },
+            {
+                'user_id': 1000,
+                'amount': 100,
+                'transaction_type': 'Пополнение',
+            },
+        ],
+    )
+
+    async with db_helper.session_factory() as session:
+        transactions = await get_user_transactions(user.id, session)
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json() == {'detail': 'User not found'}
+    assert not transactions
+
+
 @pytest.mark.asyncio
 @pytest.mark.usefixtures('reset_db')
 async def test_get_transactions(ac, user_and_transactions):
@@ -56,8 +113,204 @@ async def test_get_transactions(ac, user_and_transactions):
     assert len(response.json()) == len(transactions)
 
 
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('reset_db', 'shared_redis_mock')
+async def test_get_transactions_from_cache(
+    ac, user_and_transactions, db_helper,
+):
+    user, transactions = user_and_transactions
+    report = {
+        'user_id': user.id,
+        'date_start': datetime(2024, 1, 1).isoformat(),
+        'date_end': datetime(2124, 1, 1).isoformat(),
+    }
+
+    first_response = await ac.post('api/transactions/report/', json=report)
+    cached_response = await ac.post('api/transactions/report/', json=report)
+
+    async with db_helper.session_factory() as session:
+        reports = await get_user_reports(user.id, session)
+
+    assert cached_response.status_code == status.HTTP_201_CREATED
+    assert cached_response.headers['content-type'] == 'application/json'
+    assert cached_response.json() == first_response.json()
+    assert len(reports) == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('reset_db', 'shared_redis_mock')
+async def test_get_transactions_page(ac, user_and_transactions):
+    user, transactions = user_and_transactions
+    report = {
+        'user_id': user.id,
+        'date_start': datetime(2024, 1, 1).isoformat(),
+        'date_end': datetime(2124, 1, 1).isoformat(),
+        'limit': 1,
+    }
+
+    first_page = await ac.post('api/transactions/report/', json=report)
+    cached_page = await ac.post('api/transactions/report/', json=report)
+    next_cursor = first_page.headers['x-next-cursor']
+    last_page = await ac.post(
+        'api/transactions/report/',
+        json={**report, 'cursor': next_cursor},
+    )
+
+    assert first_page.status_code == status.HTTP_201_CREATED
+    assert cached_page.headers['x-next-cursor'] == next_cursor
+    assert cached_page.json() == first_page.json()
+    assert first_page.json() + last_page.json() == [
+        t.model_dump(mode='json') for t in transactions
+    ]
+    assert 'x-next-cursor' not in last_page.headers
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('reset_db')
+async def test_get_daily_totals(ac, user):
+    for amount in (100, 200):
+        await ac.post(
+            'api/transactions/create/',
+            json={
+                'user_id': user.id,
+                'amount': amount,
+                'transaction_type': 'Снятие',
+            },
+        )
+
+    response = await ac.post(
+        'api/transactions/report/aggregate/',
+        json={
+            'user_id': user.id,
+            'date_start': date.today().isoformat(),
+            'date_end': date.today().isoformat(),
+        },
+    )
+
+    assert response.status_code == status.HTTP_201_CREATED
+    daily_totals = response.json()
+    assert len(daily_totals) == 1
+    assert daily_totals[0]['count'] == 2
+    assert daily_totals[0]['amount'] == 300
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('reset_db')
+async def test_get_user_balance(ac, user):
+    for amount, transaction_type in ((500, 'Пополнение'), (200, 'Снятие')):
+        await ac.post(
+            'api/transactions/create/',
+            json={
+                'user_id': user.id,
+                'amount': amount,
+                'transaction_type': transaction_type,
+            },
+        )
+
+    response = await ac.get(f'api/transactions/balance/{user.id}/')
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {'user_id': user.id, 'balance': 300}
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('reset_db')
+async def test_get_user_balance_not_found(ac):
+    response = await ac.get('api/transactions/balance/1000/')
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_get_transactions_bad_cursor(ac):
+    response = await ac.post(
+        'api/transactions/report/',
+        json={
+            'user_id': 1,
+            'date_start': datetime(2024, 1, 1).isoformat(),
+            'date_end': datetime(2124, 1, 1).isoformat(),
+            'limit': 1,
+            'cursor': 'not a cursor',
+        },
+    )
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('reset_db')
+async def test_stream_transactions(ac, user_and_transactions, db_helper):
+    user, transactions = user_and_transactions
+
+    response = await ac.post(
+        'api/transactions/report/stream/',
+        json={
+            'user_id': user.id,
+            'date_start': datetime(2024, 1, 1).isoformat(),
+            'date_end': datetime(2124, 1, 1).isoformat(),
+        },
+    )
+
+    async with db_helper.session_factory() as session:
+        reports = await get_user_reports(user.id, session)
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == [t.model_dump(mode='json') for t in transactions]
+    assert len(reports) == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('reset_db')
+async def test_stream_transactions_unknown_user():
+    transport = ASGITransport(app=app, raise_app_exceptions=False)
+    async with AsyncClient(transport=transport, base_url='http://test') as ac:
+        response = await ac.post(
+            'api/transactions/report/stream/',
+            json={
+                'user_id': 1000,
+                'date_start': datetime(2024, 1, 1).isoformat(),
+                'date_end': datetime(2124, 1, 1).isoformat(),
+            },
+        )
+
+    assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+
+
+@pytest.mark.asyncio
+async def test_stream_transactions_rejects_pages(ac):
+    response = await ac.post(
+        'api/transactions/report/stream/',
+        json={
+            'user_id': 1,
+            'date_start': datetime(2024, 1, 1).isoformat(),
+            'date_end': datetime(2124, 1, 1).isoformat(),
+            'limit': 10,
+        },
+    )
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
 @pytest.mark.asyncio
 async def test_check_ready(ac):
     response = await ac.get('api/healthz/ready/')
 
     assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.asyncio
+async def test_metrics(ac):
+    await ac.get('/ready')
+
+    response = await ac.get('/metrics')
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers['content-type'].startswith('text/plain')
+    ready_count = (
+        'http_request_duration_seconds_count',
+        '{method="GET",route="/ready",status="200"}',
+    )
+    assert ''.join(ready_count) in response.text
+    assert 'db_pool_connections{state="checked_out"}' in response.text
@@ -45,7 +45,10 @@ async def test_transaction_model(amount, user, deposit_id, db_helper):
         await session.commit()
 
     async with db_helper.session_factory() as session:
-        transaction_out = await session.get(UserTransaction, transaction_in.id)
+        transaction_out = await session.get(
+            UserTransaction,
+            (transaction_in.id, transaction_in.date),
+        )
 
     assert transaction_out.amount == amount
     assert transaction_out.transaction_type_id == deposit_id
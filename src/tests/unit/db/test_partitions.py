@@ -0,0 +1,84 @@
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import text
+
+from app.config import settings
+from app.db.models import UserTransaction
+from app.db.partitions import (
+    add_months,
+    create_upcoming_partitions,
+    partition_name,
+    upcoming_months,
+)
+
+
+@pytest.mark.parametrize(
+    'month, months, expected',
+    [
+        pytest.param(date(2026, 10, 1), 1, date(2026, 11, 1), id='next'),
+        pytest.param(date(2026, 12, 1), 1, date(2027, 1, 1), id='new_year'),
+        pytest.param(date(2026, 1, 1), -1, date(2025, 12, 1), id='previous'),
+    ],
+)
+def test_add_months(month, months, expected):
+    assert add_months(month, months) == expected
+
+
+def test_upcoming_months():
+    assert upcoming_months(date(2026, 11, 18), 2) == [
+        date(2026, 11, 1),
+        date(2026, 12, 1),
+        date(2027, 1, 1),
+    ]
+
+
+def test_partition_name():
+    assert partition_name(date(2026, 1, 1)) == (
+        'lebedev_user_transaction_p2026_01'
+    )
+
+
+SELECT_PARTITION_ROWS = text(' '.join([
+    'SELECT tableoid::regclass::text, amount',
+    f'FROM {settings.db_schema}.lebedev_user_transaction',  # noqa: S608
+]))
+
+
+async def partition_rows(db_helper) -> list[tuple[str, int]]:
+    async with db_helper.engine.connect() as conn:
+        rows = await conn.execute(SELECT_PARTITION_ROWS)
+    return list(rows.tuples())
+
+
+@pytest.mark.usefixtures('reset_db')
+@pytest.mark.asyncio
+async def test_create_upcoming_partitions(db_helper, user, deposit_id):
+    async with db_helper.session_factory() as session:
+        session.add(UserTransaction(
+            user_id=user.id,
+            amount=100,
+            transaction_type_id=deposit_id,
+            date=datetime(2026, 11, 5),
+        ))
+        await session.commit()
+
+    created = await create_upcoming_partitions(
+        db_helper.engine,
+        date(2026, 10, 18),
+        1,
+    )
+    created_again = await create_upcoming_partitions(
+        db_helper.engine,
+        date(2026, 10, 18),
+        1,
+    )
+
+    assert created == [
+        'lebedev_user_transaction_p2026_10',
+        'lebedev_user_transaction_p2026_11',
+    ]
+    assert not created_again
+    assert await partition_rows(db_helper) == [
+        (f'{settings.db_schema}.lebedev_user_transaction_p2026_11', 100),
+    ]
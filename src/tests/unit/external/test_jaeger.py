@@ -1,9 +1,135 @@
-from opentracing import Tracer
+from unittest.mock import MagicMock
 
-from app.external.jaeger import initialize_jaeger_tracer
+import opentracing
+import pytest
+from jaeger_client import Tracer
+from jaeger_client.reporter import InMemoryReporter
+from jaeger_client.sampler import ConstSampler
+from opentracing.mocktracer import MockTracer
+from opentracing.scope_managers.contextvars import ContextVarsScopeManager
 
+from app.config import settings
+from app.external.jaeger import (
+    is_span_sampled,
+    set_bounded_tag,
+    tag_active_span,
+    traced,
+)
 
-def test_initialize_jaeger_tracer():
-    tracer = initialize_jaeger_tracer()
 
-    assert isinstance(tracer, Tracer)
+def make_jaeger_span(sampled: bool):
+    tracer = Tracer(
+        service_name='test',
+        reporter=InMemoryReporter(),
+        sampler=ConstSampler(decision=sampled),
+    )
+    return tracer.start_span('test')
+
+
+@pytest.mark.parametrize(
+    'span',
+    [
+        pytest.param(make_jaeger_span(sampled=True), id='jaeger'),
+        pytest.param(MockTracer().start_span('test'), id='mock'),
+    ],
+)
+def test_is_span_sampled(span):
+    assert is_span_sampled(span)
+
+
+@pytest.mark.parametrize(
+    'span',
+    [
+        pytest.param(make_jaeger_span(sampled=False), id='jaeger'),
+        pytest.param(opentracing.Tracer().start_span('test'), id='noop'),
+    ],
+)
+def test_is_span_not_sampled(span):
+    assert not is_span_sampled(span)
+
+
+@pytest.mark.parametrize(
+    'tag_value, tag',
+    [
+        pytest.param('abc', 'abc', id='short'),
+        pytest.param('x' * 10, 'xxxx...', id='truncated'),
+    ],
+)
+def test_set_bounded_tag(monkeypatch, tag_value, tag):
+    monkeypatch.setattr(settings, 'jaeger_max_tag_length', 4)
+    span = MockTracer().start_span('test')
+
+    set_bounded_tag(span, 'key', tag_value)
+
+    assert span.tags['key'] == tag
+
+
+def test_set_bounded_tag_not_sampled():
+    span = make_jaeger_span(sampled=False)
+    tag_value = MagicMock()
+
+    set_bounded_tag(span, 'key', tag_value)
+
+    assert not tag_value.mock_calls
+    assert 'key' not in span.tags
+
+
+@pytest.fixture
+def tracer(monkeypatch) -> MockTracer:
+    mock_tracer = MockTracer(scope_manager=ContextVarsScopeManager())
+    monkeypatch.setattr(opentracing, 'tracer', mock_tracer)
+    return mock_tracer
+
+
+@traced('amount')
+async def traced_function(amount: int, note: str) -> int:
+    tag_active_span('note', note)
+    return amount
+
+
+def test_set_bounded_tag_number():
+    span = MockTracer().start_span('test')
+
+    set_bounded_tag(span, 'rows', 3)
+
+    assert span.tags['rows'] == 3
+
+
+@pytest.mark.asyncio
+async def test_traced(tracer):
+    with tracer.start_active_span('parent'):
+        assert await traced_function(5, note='test') == 5
+
+    span, parent = tracer.finished_spans()
+    assert span.operation_name == 'traced_function'
+    assert span.parent_id == parent.context.span_id
+    assert span.tags == {'amount': 5, 'note': 'test'}
+
+
+@pytest.mark.asyncio
+async def test_traced_without_trace(tracer):
+    assert await traced_function(5, note='test') == 5
+
+    assert not tracer.finished_spans()
+
+
+@pytest.mark.asyncio
+async def test_traced_not_sampled(monkeypatch):
+    not_sampled_tracer = Tracer(
+        service_name='test',
+        reporter=InMemoryReporter(),
+        sampler=ConstSampler(decision=False),
+        scope_manager=ContextVarsScopeManager(),
+    )
+    monkeypatch.setattr(opentracing, 'tracer', not_sampled_tracer)
+
+    with not_sampled_tracer.start_active_span('parent') as scope:
+        assert await traced_function(5, note='test') == 5
+
+    assert not scope.span.tags
+
+
+def test_traced_disabled(monkeypatch):
+    monkeypatch.setattr(settings, 'jaeger_enabled', value=False)
+
+    assert traced()(traced_function) is traced_function
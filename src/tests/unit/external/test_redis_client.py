@@ -0,0 +1,141 @@
+from datetime import timedelta
+from itertools import repeat
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.config import settings
+from app.external.redis_client import DELETE_IF_EQUAL_SCRIPT, RedisClient
+from app.metrics import metrics_registry
+
+
+def sample_value(name: str, labels: dict[str, str] | None = None) -> float:
+    return metrics_registry.get_sample_value(name, labels or {}) or 0
+
+
+@pytest.fixture
+def redis_client(monkeypatch) -> RedisClient:
+    monkeypatch.setattr(settings, 'report_cache_max_size', 10)
+    client = RedisClient('localhost', 6379, 1)
+    client.client = AsyncMock()
+    return client
+
+
+@pytest.mark.parametrize(
+    'ttl, expected',
+    [
+        pytest.param(None, settings.report_cache_ttl, id='default'),
+        pytest.param(0.5, 0.5, id='short'),
+    ],
+)
+@pytest.mark.asyncio
+async def test_set_report_transaction_ttl(redis_client, ttl, expected):
+    await redis_client.set_report_transaction('key', '[]', ttl)
+
+    redis_client.client.set.assert_awaited_once_with(
+        'report:key', '[]', px=timedelta(seconds=expected),
+    )
+
+
+@pytest.mark.asyncio
+async def test_set_report_transaction_expired(redis_client):
+    await redis_client.set_report_transaction('key', '[]', 0)
+
+    redis_client.client.set.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_set_report_transaction_too_large(redis_client):
+    skipped = sample_value('report_cache_skipped_total')
+
+    await redis_client.set_report_transaction('key', '[1, 2, 3, 4, 5]')
+
+    redis_client.client.set.assert_not_awaited()
+    assert sample_value('report_cache_skipped_total') == skipped + 1
+
+
+@pytest.mark.parametrize(
+    'cached, result',
+    [
+        pytest.param(b'[]', 'hit', id='hit'),
+        pytest.param(None, 'miss', id='miss'),
+    ],
+)
+@pytest.mark.asyncio
+async def test_get_report_transaction_metrics(redis_client, cached, result):
+    redis_client.client.get.return_value = cached
+    labels = {'key': 'report', 'result': result}
+    before = sample_value('redis_cache_requests_total', labels)
+
+    assert await redis_client.get_report_transaction('key') == cached
+    assert sample_value('redis_cache_requests_total', labels) == before + 1
+
+
+@pytest.mark.asyncio
+async def test_acquire_report_lock(redis_client):
+    redis_client.client.set.return_value = True
+
+    token = await redis_client.acquire_report_lock('key')
+
+    redis_client.client.set.assert_awaited_once_with(
+        'report_lock:key', token, nx=True, px=settings.report_lock_ttl_ms,
+    )
+
+
+@pytest.mark.asyncio
+async def test_acquire_report_lock_busy(redis_client):
+    redis_client.client.set.return_value = None
+
+    assert await redis_client.acquire_report_lock('key') is None
+
+
+@pytest.mark.asyncio
+async def test_release_report_lock(redis_client):
+    await redis_client.release_report_lock('key', 'token')
+
+    redis_client.client.eval.assert_awaited_once_with(
+        DELETE_IF_EQUAL_SCRIPT, 1, 'report_lock:key', 'token',
+    )
+    redis_client.client.delete.assert_not_awaited()
+
+
+@pytest.mark.parametrize(
+    'polled, cached, result',
+    [
+        pytest.param(
+            [[None, b'token'], [b'[]', None]], b'[]', 'hit', id='filled',
+        ),
+        pytest.param([[None, None]], None, 'released', id='released'),
+        pytest.param(repeat([None, b'token']), None, 'timeout', id='timeout'),
+    ],
+)
+@pytest.mark.asyncio
+async def test_wait_report_transaction(
+    redis_client, monkeypatch, polled, cached, result,
+):
+    monkeypatch.setattr(settings, 'report_lock_wait', 0.05)
+    monkeypatch.setattr(settings, 'report_lock_poll_interval', 0.01)
+    redis_client.client.mget.side_effect = polled
+    labels = {'result': result}
+    before = sample_value('report_lock_waits_total', labels)
+
+    assert await redis_client.wait_report_transaction('key') == cached
+    assert sample_value('report_lock_waits_total', labels) == before + 1
+
+
+@pytest.mark.parametrize(
+    'cached, result',
+    [
+        pytest.param(b'1', 'hit', id='hit'),
+        pytest.param(None, 'miss', id='miss'),
+    ],
+)
+@pytest.mark.asyncio
+async def test_get_transaciton_type_id_metrics(redis_client, cached, result):
+    redis_client.client.get.return_value = cached
+    labels = {'key': 'tt_id', 'result': result}
+    before = sample_value('redis_cache_requests_total', labels)
+
+    await redis_client.get_transaciton_type_id('Пополнение')
+
+    assert sample_value('redis_cache_requests_total', labels) == before + 1
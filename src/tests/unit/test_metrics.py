@@ -0,0 +1,23 @@
+from prometheus_client import CollectorRegistry, generate_latest
+
+from app.metrics import CallbackGauge, metrics_registry
+
+
+def test_callback_gauge_collects_on_render():
+    registry = CollectorRegistry()
+    pool_stats = {'size': 10}
+    registry.register(
+        CallbackGauge('pool', 'Пул.', 'state', lambda: pool_stats),
+    )
+
+    pool_stats['size'] = 20
+
+    assert registry.get_sample_value('pool', {'state': 'size'}) == 20
+    assert 'pool{state="size"} 20.0' in generate_latest(registry).decode()
+
+
+def test_registry_has_service_metrics():
+    rendered = generate_latest(metrics_registry).decode()
+
+    assert '# TYPE http_request_duration_seconds histogram' in rendered
+    assert '# TYPE db_pool_connections gauge' in rendered
@@ -0,0 +1,131 @@
+import opentracing
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from opentracing import tags
+from opentracing.mocktracer import MockTracer
+from opentracing.scope_managers.contextvars import ContextVarsScopeManager
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from app.config import settings
+from app.metrics import metrics_registry
+from app.middleware import MetricsMiddleware, TracingMiddleware
+
+
+async def created(request):
+    return PlainTextResponse('created', status_code=201)
+
+
+async def stream(request):
+    return StreamingResponse(iter([b'a\n', b'b\n']))
+
+
+@pytest.fixture
+def tracer(monkeypatch) -> MockTracer:
+    mock_tracer = MockTracer(scope_manager=ContextVarsScopeManager())
+    monkeypatch.setattr(opentracing, 'tracer', mock_tracer)
+    return mock_tracer
+
+
+@pytest.fixture
+def client() -> AsyncClient:
+    asgi_app = Starlette(
+        routes=[
+            Route('/api/created/', created),
+            Route('/api/stream/', stream),
+            Route('/created/', created),
+        ],
+    )
+    return AsyncClient(
+        transport=ASGITransport(app=TracingMiddleware(asgi_app)),
+        base_url='http://test',
+    )
+
+
+@pytest.mark.asyncio
+async def test_tracing_middleware_span(tracer, client):
+    response = await client.get('/api/created/')
+
+    assert response.status_code == 201
+    span = tracer.finished_spans()[0]
+    assert span.operation_name == f'{settings.service_name}_GET_/api/created/'
+    assert span.tags[tags.HTTP_STATUS_CODE] == 201
+    assert span.tags[tags.HTTP_METHOD] == 'GET'
+
+
+@pytest.mark.asyncio
+async def test_tracing_middleware_streaming(tracer, client):
+    response = await client.get('/api/stream/')
+
+    assert response.text == 'a\nb\n'
+    assert len(tracer.finished_spans()) == 1
+
+
+@pytest.mark.asyncio
+async def test_tracing_middleware_skips_not_api(tracer, client):
+    response = await client.get('/created/')
+
+    assert response.status_code == 201
+    assert not tracer.finished_spans()
+
+
+async def get_item(item_id: int):
+    return {'id': item_id}
+
+
+async def failed():
+    raise RuntimeError('failed')
+
+
+@pytest.fixture
+def metrics_client() -> AsyncClient:
+    asgi_app = FastAPI()
+    asgi_app.get('/api/items/{item_id}/')(get_item)
+    asgi_app.get('/api/failed/')(failed)
+    return AsyncClient(
+        transport=ASGITransport(
+            app=MetricsMiddleware(asgi_app),
+            raise_app_exceptions=False,
+        ),
+        base_url='http://test',
+    )
+
+
+def observed_count(method: str, route: str, status_code: str) -> float:
+    observed = metrics_registry.get_sample_value(
+        'http_request_duration_seconds_count',
+        {'method': method, 'route': route, 'status': status_code},
+    )
+    return observed or 0
+
+
+@pytest.mark.asyncio
+async def test_metrics_middleware_route_template(metrics_client):
+    before = observed_count('GET', '/api/items/{item_id}/', '200')
+
+    await metrics_client.get('/api/items/1/')
+    await metrics_client.get('/api/items/2/')
+
+    assert observed_count('GET', '/api/items/{item_id}/', '200') == before + 2
+
+
+@pytest.mark.asyncio
+async def test_metrics_middleware_unmatched(metrics_client):
+    before = observed_count('GET', 'unmatched', '404')
+
+    response = await metrics_client.get('/api/missing/')
+
+    assert response.status_code == 404
+    assert observed_count('GET', 'unmatched', '404') == before + 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_middleware_error(metrics_client):
+    before = observed_count('GET', '/api/failed/', '500')
+
+    response = await metrics_client.get('/api/failed/')
+
+    assert response.status_code == 500
+    assert observed_count('GET', '/api/failed/', '500') == before + 1
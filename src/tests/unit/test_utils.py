@@ -0,0 +1,188 @@
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+
+from app.transaction_service.schemas import TransactionOutSchema
+from app.utils import (  # noqa: WPS235
+    CACHE_FORMAT_WIRE,
+    SingleFlight,
+    cache_dump,
+    cache_load,
+    cache_page_dump,
+    cache_page_load,
+    cache_wire_payload,
+    decode_cursor,
+    encode_cursor,
+    json_nested_dump,
+    json_wire_dump,
+    ndjson_dump,
+)
+
+TRANSACTIONS = (
+    TransactionOutSchema(
+        user_id=1,
+        amount=100,
+        transaction_type_id=1,
+        date=datetime(2024, 1, 1, 12, 30),
+    ),
+    TransactionOutSchema(
+        user_id=1,
+        amount=300,
+        transaction_type_id=2,
+        date=datetime(2024, 1, 2),
+    ),
+)
+
+
+@pytest.mark.parametrize(
+    'transactions',
+    [
+        pytest.param(list(TRANSACTIONS), id='transactions'),
+        pytest.param([], id='empty'),
+    ],
+)
+def test_cache_dump_load(transactions):
+    cached = cache_dump(transactions)
+
+    assert cached.startswith(CACHE_FORMAT_WIRE)
+    restored = [
+        TransactionOutSchema.model_validate(t) for t in cache_load(cached)
+    ]
+    assert restored == transactions
+
+
+def test_cache_wire_payload():
+    payload = cache_wire_payload(cache_dump(TRANSACTIONS))
+
+    assert json.loads(payload) == [
+        {
+            'user_id': 1,
+            'amount': 100,
+            'transaction_type_id': 1,
+            'date': '2024-01-01T12:30:00',
+        },
+        {
+            'user_id': 1,
+            'amount': 300,
+            'transaction_type_id': 2,
+            'date': '2024-01-02T00:00:00',
+        },
+    ]
+
+
+@pytest.mark.parametrize(
+    'cached',
+    [
+        pytest.param(json_nested_dump(TRANSACTIONS), id='str'),
+        pytest.param(json_nested_dump(TRANSACTIONS).encode(), id='bytes'),
+    ],
+)
+def test_cache_load_legacy(cached):
+    restored = [
+        TransactionOutSchema.model_validate(t) for t in cache_load(cached)
+    ]
+
+    assert restored == list(TRANSACTIONS)
+
+
+def test_ndjson_dump():
+    dumped = ndjson_dump(TRANSACTIONS)
+
+    assert dumped.endswith(b'\n')
+    restored = [
+        TransactionOutSchema.model_validate_json(line)
+        for line in dumped.splitlines()
+    ]
+    assert restored == list(TRANSACTIONS)
+    assert ndjson_dump([]) == b''
+
+
+def test_cursor_roundtrip():
+    position = (datetime(2024, 1, 1, 12, 30, 15, 123456), 42)
+
+    assert decode_cursor(encode_cursor(*position)) == position
+
+
+@pytest.mark.parametrize(
+    'cursor',
+    [
+        pytest.param('not a cursor', id='not_base64'),
+        pytest.param(encode_cursor(datetime(2024, 1, 1), 1)[:-4], id='cut'),
+    ],
+)
+def test_decode_bad_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+@pytest.mark.parametrize(
+    'next_cursor',
+    [
+        pytest.param(encode_cursor(datetime(2024, 1, 2), 2), id='next'),
+        pytest.param(None, id='last'),
+    ],
+)
+def test_cache_page_dump_load(next_cursor):
+    payload = json_wire_dump(TRANSACTIONS)
+
+    cached = cache_page_dump(payload, next_cursor)
+
+    assert cache_page_load(cached) == (payload, next_cursor)
+    assert cache_page_load(cache_dump(TRANSACTIONS)) is None
+
+
+@pytest.mark.asyncio
+async def test_single_flight_coalesces_calls():
+    flights: SingleFlight[int] = SingleFlight()
+    calls = []
+
+    async def compute(flight_result):
+        calls.append(flight_result)
+        await asyncio.sleep(0.01)
+        return flight_result
+
+    flight_results = await asyncio.gather(
+        *(flights.do('key', compute, call) for call in range(3)),
+    )
+
+    assert calls == [0]
+    assert flight_results == [0, 0, 0]
+    assert not flights.flights
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_exception():
+    flights: SingleFlight[int] = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError('failed')
+
+    flight_results = await asyncio.gather(
+        flights.do('key', fail),
+        flights.do('key', fail),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(error, RuntimeError) for error in flight_results)
+    assert not flights.flights
+
+
+@pytest.mark.asyncio
+async def test_single_flight_leader_cancelled():
+    flights: SingleFlight[int] = SingleFlight()
+
+    async def compute(flight_result):
+        await asyncio.sleep(0.01)
+        return flight_result
+
+    leader = asyncio.create_task(flights.do('key', compute, 1))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flights.do('key', compute, 2))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower == 2
+    assert leader.cancelled()
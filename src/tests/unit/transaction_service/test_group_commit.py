@@ -0,0 +1,142 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from fastapi import HTTPException, status
+
+from app.db.models import User
+from app.metrics import metrics_registry
+from app.transaction_service.group_commit import GroupCommitBuffer
+from app.transaction_service.schemas import (
+    TransactionSchema,
+    TransactionTypeSchema,
+)
+from tests.crud_for_test import get_user_transactions
+
+
+def deposit(user_id: int, amount: int) -> TransactionSchema:
+    return TransactionSchema(
+        user_id=user_id,
+        amount=amount,
+        transaction_type=TransactionTypeSchema.DEPOSIT,
+    )
+
+
+def group_count() -> float:
+    observed = metrics_registry.get_sample_value(
+        'transaction_group_size_count',
+    )
+    return observed or 0
+
+
+def invalidate_errors() -> float:
+    errors = metrics_registry.get_sample_value(
+        'cache_update_errors_total',
+        {'operation': 'invalidate_report_cache'},
+    )
+    return errors or 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('reset_db')
+async def test_group_commit(user, db_helper, redis_mock):
+    buffer = GroupCommitBuffer(max_rows=10, interval=0.05)
+    buffer.start(db_helper.session_factory, redis_mock)
+    groups_before = group_count()
+
+    await asyncio.gather(*(
+        buffer.submit(deposit(user.id, amount)) for amount in (100, 200, 300)
+    ))
+    await buffer.stop()
+
+    async with db_helper.session_factory() as session:
+        transactions = await get_user_transactions(user.id, session)
+        saved_user = await session.get(User, user.id)
+
+    assert sorted(t.amount for t in transactions) == [100, 200, 300]
+    assert saved_user.balance == 600
+    assert group_count() == groups_before + 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('reset_db')
+async def test_group_commit_redis_fails_after_commit(
+    user, db_helper, redis_mock,
+):
+    redis_mock.incr_report_version = AsyncMock(side_effect=ConnectionError)
+    errors_before = invalidate_errors()
+    buffer = GroupCommitBuffer(max_rows=10, interval=0.05)
+    buffer.start(db_helper.session_factory, redis_mock)
+
+    await asyncio.gather(*(
+        buffer.submit(deposit(user.id, 10)) for _ in range(3)
+    ))
+    await buffer.stop()
+
+    async with db_helper.session_factory() as session:
+        transactions = await get_user_transactions(user.id, session)
+        saved_user = await session.get(User, user.id)
+
+    assert len(transactions) == 3
+    assert saved_user.balance == 30
+    assert invalidate_errors() == errors_before + 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('reset_db')
+async def test_group_commit_full_group(user, db_helper, redis_mock):
+    buffer = GroupCommitBuffer(max_rows=2, interval=60)
+    buffer.start(db_helper.session_factory, redis_mock)
+
+    await asyncio.wait_for(
+        asyncio.gather(
+            buffer.submit(deposit(user.id, 100)),
+            buffer.submit(deposit(user.id, 200)),
+        ),
+        timeout=5,
+    )
+    await buffer.stop()
+
+    async with db_helper.session_factory() as session:
+        transactions = await get_user_transactions(user.id, session)
+
+    assert len(transactions) == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('reset_db')
+async def test_group_commit_unknown_user(user, db_helper, redis_mock):
+    buffer = GroupCommitBuffer(max_rows=10, interval=0.05)
+    buffer.start(db_helper.session_factory, redis_mock)
+
+    created, failed = await asyncio.gather(
+        buffer.submit(deposit(user.id, 100)),
+        buffer.submit(deposit(1000, 100)),
+        return_exceptions=True,
+    )
+    await buffer.stop()
+
+    async with db_helper.session_factory() as session:
+        transactions = await get_user_transactions(user.id, session)
+
+    assert created is None
+    assert isinstance(failed, HTTPException)
+    assert failed.status_code == status.HTTP_404_NOT_FOUND
+    assert len(transactions) == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('reset_db')
+async def test_group_commit_stop_writes_queued(user, db_helper, redis_mock):
+    buffer = GroupCommitBuffer(max_rows=10, interval=60)
+    buffer.start(db_helper.session_factory, redis_mock)
+    submitted = asyncio.ensure_future(buffer.submit(deposit(user.id, 100)))
+    await asyncio.sleep(0)
+
+    await buffer.stop()
+
+    assert submitted.done()
+    assert not buffer.is_running()
+    async with db_helper.session_factory() as session:
+        transactions = await get_user_transactions(user.id, session)
+    assert len(transactions) == 1
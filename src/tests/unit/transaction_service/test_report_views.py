@@ -0,0 +1,479 @@
+import asyncio
+from datetime import datetime
+from unittest.mock import AsyncMock
+
+import pytest
+import sqlalchemy
+from fastapi import Response, status
+from pydantic import TypeAdapter
+
+from app.config import settings
+from app.db.models import ReportTransactionRelation
+from app.transaction_service import report_views
+from app.transaction_service.report_cache import get_report_key
+from app.transaction_service.report_views import (
+    NEXT_CURSOR_HEADER,
+    get_transactions_page_view,
+    get_transactions_view,
+    stream_transactions_view,
+)
+from app.transaction_service.reports import save_report
+from app.transaction_service.schemas import (
+    TransactionOutSchema,
+    TransactionReportSchema,
+    TransactionSchema,
+    TransactionTypeSchema,
+)
+from app.transaction_service.views import create_transaction_view
+from app.utils import cache_dump, json_nested_dump
+from tests.crud_for_test import get_report_transactions, get_user_reports
+
+
+@pytest.mark.usefixtures('reset_db')
+@pytest.mark.asyncio
+async def test_get_transactions_found_all(
+    user_and_transactions, db_helper, redis_mock,
+):
+    user, transactions_out = user_and_transactions
+
+    async with db_helper.session_factory() as session:
+        user_transactions = await get_transactions_view(
+            TransactionReportSchema(
+                user_id=user.id,
+                date_start=datetime(2024, 1, 1),
+                date_end=datetime(2124, 1, 1),
+            ),
+            session,
+            redis_mock,
+        )
+
+    assert user_transactions == transactions_out
+
+
+@pytest.mark.usefixtures('reset_db')
+@pytest.mark.asyncio
+async def test_get_transactions_not_found(
+    user_and_transactions, db_helper, redis_mock,
+):
+    user, transactions_out = user_and_transactions
+
+    async with db_helper.session_factory() as session:
+        user_transactions = await get_transactions_view(
+            TransactionReportSchema(
+                user_id=user.id,
+                date_start=datetime(1000, 1, 1),
+                date_end=datetime(1000, 1, 1),
+            ),
+            session,
+            redis_mock,
+        )
+
+    assert not user_transactions
+
+
+@pytest.mark.usefixtures('reset_db')
+@pytest.mark.asyncio
+async def test_get_transaction_report_exists_in_cache(db_helper, redis_mock):
+    cashed_transactions = [
+        TransactionOutSchema(
+            user_id=1,
+            amount=100,
+            transaction_type_id=1,
+            date=datetime.now(),
+        ),
+        TransactionOutSchema(
+            user_id=1,
+            amount=300,
+            transaction_type_id=2,
+            date=datetime.now(),
+        ),
+    ]
+
+    redis_mock.get_report_transaction = AsyncMock(
+        return_value=json_nested_dump(cashed_transactions),
+    )
+
+    async with db_helper.session_factory() as session:
+        user_transactions = await get_transactions_view(
+            TransactionReportSchema(
+                user_id=1,
+                date_start=datetime(2024, 1, 1),
+                date_end=datetime(2124, 1, 1),
+            ),
+            session,
+            redis_mock,
+        )
+
+    restored_transactions = [
+        TransactionOutSchema.model_validate(t) for t in user_transactions
+    ]
+    assert restored_transactions == cashed_transactions
+
+
+@pytest.mark.usefixtures('reset_db')
+@pytest.mark.asyncio
+async def test_get_transaction_report_wire_cache(db_helper, redis_mock):
+    cashed_transactions = [
+        TransactionOutSchema(
+            user_id=1,
+            amount=100,
+            transaction_type_id=1,
+            date=datetime.now(),
+        ),
+    ]
+    redis_mock.get_report_transaction = AsyncMock(
+        return_value=cache_dump(cashed_transactions),
+    )
+    replica_factory = AsyncMock()
+
+    async with db_helper.session_factory() as session:
+        response = await get_transactions_view(
+            TransactionReportSchema(
+                user_id=1,
+                date_start=datetime(2024, 1, 1),
+                date_end=datetime(2124, 1, 1),
+            ),
+            session,
+            redis_mock,
+            replica_factory,
+        )
+
+    replica_factory.assert_not_awaited()
+    assert isinstance(response, Response)
+    assert response.status_code == status.HTTP_201_CREATED
+    restored = TypeAdapter(list[TransactionOutSchema]).validate_json(
+        response.body,
+    )
+    assert restored == cashed_transactions
+
+
+@pytest.mark.usefixtures('reset_db')
+@pytest.mark.asyncio
+async def test_stream_transactions(
+    user_and_transactions, db_helper, monkeypatch,
+):
+    user, transactions_out = user_and_transactions
+    monkeypatch.setattr(settings, 'report_stream_chunk_size', 1)
+
+    chunks = [
+        chunk
+        async for chunk in stream_transactions_view(
+            TransactionReportSchema(
+                user_id=user.id,
+                date_start=datetime(2024, 1, 1),
+                date_end=datetime(2124, 1, 1),
+            ),
+            db_helper.session_factory,
+        )
+    ]
+
+    assert len(chunks) == len(transactions_out)
+    streamed = [
+        TransactionOutSchema.model_validate_json(line)
+        for line in b''.join(chunks).splitlines()
+    ]
+    assert streamed == transactions_out
+
+
+@pytest.mark.usefixtures('reset_db')
+@pytest.mark.asyncio
+async def test_get_transaction_report(
+    user_and_transactions, db_helper, redis_mock,
+):
+    user, transactions_out = user_and_transactions
+
+    async with db_helper.session_factory() as session:
+        await get_transactions_view(
+            TransactionReportSchema(
+                user_id=user.id,
+                date_start=datetime(2024, 1, 1),
+                date_end=datetime(2124, 1, 1),
+            ),
+            session,
+            redis_mock,
+        )
+
+        reports = await get_user_reports(user.id, session)
+        report_transactions = await get_report_transactions(user.id, session)
+
+    assert len(redis_mock.get_cash()) == 1
+    assert len(reports) == 1
+    report = reports[0]
+
+    assert report.date_start == datetime(2024, 1, 1)
+    assert report.date_end == datetime(2124, 1, 1)
+    assert len(report_transactions) == len(transactions_out)
+
+
+@pytest.mark.usefixtures('reset_db')
+@pytest.mark.asyncio
+async def test_replica_report_cached_briefly(
+    user_and_transactions, db_helper, redis_mock,
+):
+    user, transactions_out = user_and_transactions
+    redis_mock.set_report_transaction = AsyncMock()
+
+    replica_factory = AsyncMock(return_value=db_helper.session_factory)
+
+    async with db_helper.session_factory() as session:
+        report_out = await get_transactions_view(
+            TransactionReportSchema(
+                user_id=user.id,
+                date_start=datetime(2024, 1, 1),
+                date_end=datetime(2124, 1, 1),
+            ),
+            session,
+            redis_mock,
+            replica_factory,
+        )
+
+    assert report_out == transactions_out
+    replica_factory.assert_awaited_once()
+    _, _, ttl = redis_mock.set_report_transaction.await_args.args
+    assert ttl == settings.db_replica_max_lag
+
+
+@pytest.mark.usefixtures('reset_db')
+@pytest.mark.asyncio
+async def test_get_transaction_report_pages(
+    user_and_transactions, db_helper, redis_mock,
+):
+    user, transactions_out = user_and_transactions
+    adapter = TypeAdapter(list[TransactionOutSchema])
+    pages = []
+    cursor = None
+
+    async with db_helper.session_factory() as session:
+        for _ in transactions_out:
+            response = await get_transactions_page_view(
+                TransactionReportSchema(
+                    user_id=user.id,
+                    date_start=datetime(2024, 1, 1),
+                    date_end=datetime(2124, 1, 1),
+                    limit=1,
+                    cursor=cursor,
+                ),
+                1,
+                session,
+                redis_mock,
+            )
+            pages.extend(adapter.validate_json(response.body))
+            cursor = response.headers.get(NEXT_CURSOR_HEADER)
+
+        reports = await get_user_reports(user.id, session)
+
+    assert pages == transactions_out
+    assert cursor is None
+    assert len(redis_mock.get_cash()) == len(transactions_out)
+    assert len(reports) == 1
+
+
+@pytest.mark.usefixtures('reset_db')
+@pytest.mark.asyncio
+async def test_concurrent_reports_built_once(
+    user_and_transactions, db_helper, redis_mock, monkeypatch,
+):
+    user, transactions_out = user_and_transactions
+    report = TransactionReportSchema(
+        user_id=user.id,
+        date_start=datetime(2024, 1, 1),
+        date_end=datetime(2124, 1, 1),
+    )
+
+    build = AsyncMock(wraps=report_views.build_transactions_report)
+    monkeypatch.setattr(report_views, 'build_transactions_report', build)
+
+    async def get_report():
+        async with db_helper.session_factory() as session:
+            return await get_transactions_view(report, session, redis_mock)
+
+    reports_out = await asyncio.gather(get_report(), get_report())
+
+    assert reports_out == [transactions_out, transactions_out]
+    assert build.await_count == 1
+
+
+@pytest.mark.usefixtures('reset_db')
+@pytest.mark.asyncio
+async def test_report_lock_released_on_error(
+    user, db_helper, redis_mock, monkeypatch,
+):
+    monkeypatch.setattr(
+        report_views,
+        'build_transactions_report',
+        AsyncMock(side_effect=ConnectionError),
+    )
+
+    async with db_helper.session_factory() as session:
+        with pytest.raises(ConnectionError):
+            await get_transactions_view(
+                TransactionReportSchema(
+                    user_id=user.id,
+                    date_start=datetime(2024, 1, 1),
+                    date_end=datetime(2124, 1, 1),
+                ),
+                session,
+                redis_mock,
+            )
+
+    redis_mock.release_report_lock.assert_awaited_once()
+
+
+@pytest.mark.usefixtures('reset_db')
+@pytest.mark.asyncio
+async def test_report_built_by_other_process(
+    user_and_transactions, db_helper, redis_mock,
+):
+    user, transactions_out = user_and_transactions
+    redis_mock.acquire_report_lock = AsyncMock(return_value=None)
+    redis_mock.wait_report_transaction = AsyncMock(
+        return_value=cache_dump(transactions_out),
+    )
+
+    async with db_helper.session_factory() as session:
+        report_out = await get_transactions_view(
+            TransactionReportSchema(
+                user_id=user.id,
+                date_start=datetime(2024, 1, 1),
+                date_end=datetime(2124, 1, 1),
+            ),
+            session,
+            redis_mock,
+        )
+        reports = await get_user_reports(user.id, session)
+
+    restored = [TransactionOutSchema.model_validate(t) for t in report_out]
+    assert restored == transactions_out
+    assert not reports
+
+
+@pytest.mark.usefixtures('reset_db')
+@pytest.mark.asyncio
+async def test_save_report_only_period_transactions(
+    user_and_transactions, db_helper,
+):
+    user, _ = user_and_transactions
+    report_in = TransactionReportSchema(
+        user_id=user.id,
+        date_start=datetime(1000, 1, 1),
+        date_end=datetime(1000, 1, 2),
+    )
+
+    async with db_helper.session_factory() as session:
+        await save_report(report_in, session)
+        reports = await get_user_reports(user.id, session)
+        report_transactions = await get_report_transactions(
+            reports[0].id, session,
+        )
+
+    assert len(reports) == 1
+    assert not report_transactions
+
+
+@pytest.mark.usefixtures('reset_db')
+@pytest.mark.asyncio
+async def test_save_report_deduplicated(
+    user_and_transactions, db_helper, redis_mock,
+):
+    user, transactions_out = user_and_transactions
+    report_in = TransactionReportSchema(
+        user_id=user.id,
+        date_start=datetime(2024, 1, 1),
+        date_end=datetime(2124, 1, 1),
+    )
+
+    async with db_helper.session_factory() as session:
+        for _ in range(2):
+            await save_report(report_in, session)
+        await create_transaction_view(
+            TransactionSchema(
+                user_id=user.id,
+                amount=500,
+                transaction_type=TransactionTypeSchema.DEPOSIT,
+            ),
+            session,
+            redis_mock,
+        )
+        await save_report(report_in, session)
+        reports = await get_user_reports(user.id, session)
+        relations_count = await session.scalar(
+            sqlalchemy.select(sqlalchemy.func.count())
+            .select_from(ReportTransactionRelation),
+        )
+
+    assert len(reports) == 1
+    assert relations_count == len(transactions_out) + 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('reset_db')
+async def test_get_transaction_wrong_user(db_helper, redis_mock):
+    async with db_helper.session_factory() as session:
+        with pytest.raises(sqlalchemy.exc.IntegrityError):
+            await get_transactions_view(
+                TransactionReportSchema(
+                    user_id=1000,
+                    date_start=datetime(2024, 1, 1),
+                    date_end=datetime(2124, 1, 1),
+                ),
+                session,
+                redis_mock,
+            )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    'user_id, date_start, date_end, version, concated',
+    [
+        pytest.param(
+            1,
+            datetime(2024, 1, 1),
+            datetime(2124, 1, 1),
+            0,
+            '1_v0_2024-01-01T00:00:00_2124-01-01T00:00:00',
+            id='big_range',
+        ),
+        pytest.param(
+            2,
+            datetime(2024, 1, 1),
+            datetime(2024, 1, 1),
+            3,
+            '2_v3_2024-01-01T00:00:00_2024-01-01T00:00:00',
+            id='small_range',
+        ),
+    ],
+)
+async def test_get_report_key(
+    user_id, date_start, date_end, version, concated,
+):
+    assert get_report_key(user_id, date_start, date_end, version) == concated
+
+
+@pytest.mark.usefixtures('reset_db')
+@pytest.mark.asyncio
+async def test_report_cache_invalidated_on_create(
+    user_and_transactions, db_helper, redis_mock,
+):
+    user, transactions_out = user_and_transactions
+    report = TransactionReportSchema(
+        user_id=user.id,
+        date_start=datetime(2024, 1, 1),
+        date_end=datetime(2124, 1, 1),
+    )
+
+    async with db_helper.session_factory() as session:
+        await get_transactions_view(report, session, redis_mock)
+        await create_transaction_view(
+            TransactionSchema(
+                user_id=user.id,
+                amount=500,
+                transaction_type=TransactionTypeSchema.DEPOSIT,
+            ),
+            session,
+            redis_mock,
+        )
+        user_transactions = await get_transactions_view(
+            report, session, redis_mock,
+        )
+
+    assert len(user_transactions) == len(transactions_out) + 1
@@ -8,6 +8,7 @@ from app.transaction_service.schemas import (
     TransactionSchema,
     TransactionTypeSchema,
 )
+from app.utils import encode_cursor
 
 
 @pytest.mark.parametrize(
@@ -202,6 +203,31 @@ def test_transaction_report_schema(pyload):
             'Input should be a valid datetime',
             id='date_end_none',
         ),
+        pytest.param
+        (
+            {
+                'user_id': 1,
+                'date_start': datetime(2024, 1, 1),
+                'date_end': datetime(2124, 1, 1),
+                'limit': 0,
+            },
+            'limit',
+            'Input should be greater than 0',
+            id='limit_zero',
+        ),
+        pytest.param
+        (
+            {
+                'user_id': 1,
+                'date_start': datetime(2024, 1, 1),
+                'date_end': datetime(2124, 1, 1),
+                'limit': 1,
+                'cursor': 'not a cursor',
+            },
+            'cursor',
+            'Value error, invalid cursor',
+            id='bad_cursor',
+        ),
     ],
 )
 def test_transaction_report_schema_fail(pyload, bad_field, error_msg):
@@ -212,3 +238,26 @@ def test_transaction_report_schema_fail(pyload, bad_field, error_msg):
     ex_info = ex.value.errors()[0]
     assert ex_info['loc'] == (bad_field,)
     assert ex_info['msg'] == error_msg
+
+
+def test_report_schema_cursor_without_limit():
+    with pytest.raises(ValidationError) as ex:
+        TransactionReportSchema(
+            user_id=1,
+            date_start=datetime(2024, 1, 1),
+            date_end=datetime(2124, 1, 1),
+            cursor=encode_cursor(datetime(2024, 1, 1), 1),
+        )
+
+    assert ex.value.errors()[0]['msg'] == 'Value error, cursor requires limit'
+
+
+@pytest.mark.parametrize(
+    'transaction_type, sign',
+    [
+        pytest.param(TransactionTypeSchema.DEPOSIT, 1, id='deposit'),
+        pytest.param(TransactionTypeSchema.WITHDRAWAL, -1, id='withdrawal'),
+    ],
+)
+def test_transaction_type_sign(transaction_type, sign):
+    assert transaction_type.sign == sign
@@ -1,26 +1,27 @@
-from datetime import datetime
-from unittest.mock import Mock
+import asyncio
+from datetime import date
+from unittest.mock import AsyncMock
 
 import pytest
-import sqlalchemy
+from fastapi import HTTPException, status
 
+from app.transaction_service.daily_rollup import daily_rollup_rows
 from app.transaction_service.schemas import (
-    TransactionOutSchema,
-    TransactionReportSchema,
+    TransactionAggregateReportSchema,
     TransactionSchema,
     TransactionTypeSchema,
 )
+from app.transaction_service.transaction_types import (
+    load_transaction_type_registry,
+)
+from app.transaction_service.type_registry import transaction_type_registry
 from app.transaction_service.views import (
     create_transaction_view,
-    get_report_key,
-    get_transactions_view,
-)
-from app.utils import json_nested_dump
-from tests.crud_for_test import (
-    get_report_transactions,
-    get_user_reports,
-    get_user_transactions,
+    create_transactions_batch_view,
+    get_daily_totals_view,
+    get_user_balance_view,
 )
+from tests.crud_for_test import get_user_transactions
 
 
 @pytest.mark.parametrize(
@@ -46,11 +47,65 @@ async def test_create_transaction(
             redis_mock,
         )
         transactions = await get_user_transactions(user.id, session)
+        balance = await get_user_balance_view(user.id, session)
 
     assert len(transactions) == 1
     transaction = transactions[0]
     assert transaction.amount == amount
     assert transaction.user_id == user.id
+    assert balance.balance == transaction_type.sign * amount
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('reset_db')
+async def test_create_transaction_existing_type(
+    user, deposit_id, db_helper, redis_mock,
+):
+    async with db_helper.session_factory() as session:
+        await create_transaction_view(
+            TransactionSchema(
+                user_id=user.id,
+                amount=100,
+                transaction_type=TransactionTypeSchema.DEPOSIT,
+            ),
+            session,
+            redis_mock,
+        )
+        transactions = await get_user_transactions(user.id, session)
+
+    assert transactions[0].transaction_type_id == deposit_id
+    assert redis_mock.get_cash() == {'tt_id:Пополнение': deposit_id}
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('reset_db')
+async def test_load_transaction_type_registry(deposit_id, db_helper):
+    async with db_helper.session_factory() as session:
+        await load_transaction_type_registry(session)
+
+    assert transaction_type_registry.get('Пополнение') == deposit_id
+    assert transaction_type_registry.get('Снятие')
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('reset_db')
+async def test_create_transaction_registry_loaded(user, db_helper, redis_mock):
+    async with db_helper.session_factory() as session:
+        await load_transaction_type_registry(session)
+        await create_transaction_view(
+            TransactionSchema(
+                user_id=user.id,
+                amount=100,
+                transaction_type=TransactionTypeSchema.WITHDRAWAL,
+            ),
+            session,
+            redis_mock,
+        )
+        transactions = await get_user_transactions(user.id, session)
+
+    withdrawal_id = transaction_type_registry.get('Снятие')
+    assert transactions[0].transaction_type_id == withdrawal_id
+    assert not redis_mock.get_cash()
 
 
 @pytest.mark.asyncio
@@ -73,152 +128,180 @@ async def test_create_many_transactions(user, db_helper, redis_mock):
     assert len(transactions) == 5
 
 
-@pytest.mark.usefixtures('reset_db')
 @pytest.mark.asyncio
-async def test_get_transactions_found_all(
-    user_and_transactions, db_helper, redis_mock,
-):
-    user, transactions_out = user_and_transactions
+@pytest.mark.usefixtures('reset_db')
+async def test_create_transactions_batch(user, db_helper, redis_mock):
+    batch = [
+        TransactionSchema(
+            user_id=user.id,
+            amount=amount,
+            transaction_type=transaction_type,
+        )
+        for amount, transaction_type in (
+            (100, TransactionTypeSchema.DEPOSIT),
+            (200, TransactionTypeSchema.WITHDRAWAL),
+            (300, TransactionTypeSchema.DEPOSIT),
+        )
+    ]
 
     async with db_helper.session_factory() as session:
-        user_transactions = await get_transactions_view(
-            TransactionReportSchema(
-                user_id=user.id,
-                date_start=datetime(2024, 1, 1),
-                date_end=datetime(2124, 1, 1),
-            ),
-            session,
-            redis_mock,
+        transaction_ids = await create_transactions_batch_view(
+            batch, session, redis_mock,
         )
+        transactions = await get_user_transactions(user.id, session)
 
-    assert user_transactions == transactions_out
+    assert len(transaction_ids) == 3
+    assert set(transaction_ids) == {t.id for t in transactions}
+    amounts = {t.id: t.amount for t in transactions}
+    saved_amounts = [amounts[t_id] for t_id in transaction_ids]
+    assert saved_amounts == [100, 200, 300]
+    assert len(redis_mock.get_cash()) == 2
 
 
-@pytest.mark.usefixtures('reset_db')
 @pytest.mark.asyncio
-async def test_get_transactions_not_found(
-    user_and_transactions, db_helper, redis_mock,
+@pytest.mark.usefixtures('reset_db')
+async def test_create_single_and_batch_concurrently(
+    user, db_helper, redis_mock,
 ):
-    user, transactions_out = user_and_transactions
+    transaction = TransactionSchema(
+        user_id=user.id,
+        amount=1,
+        transaction_type=TransactionTypeSchema.DEPOSIT,
+    )
+
+    async def create_single():
+        async with db_helper.session_factory() as session:
+            await create_transaction_view(transaction, session, redis_mock)
+
+    async def create_batch():
+        async with db_helper.session_factory() as session:
+            await create_transactions_batch_view(
+                [transaction], session, redis_mock,
+            )
+
+    await asyncio.gather(*(
+        create() for _ in range(20) for create in (create_single, create_batch)
+    ))
 
     async with db_helper.session_factory() as session:
-        user_transactions = await get_transactions_view(
-            TransactionReportSchema(
-                user_id=user.id,
-                date_start=datetime(1000, 1, 1),
-                date_end=datetime(1000, 1, 1),
-            ),
-            session,
-            redis_mock,
-        )
+        transactions = await get_user_transactions(user.id, session)
+    assert len(transactions) == 40
 
-    assert not user_transactions
+
+def test_daily_rollup_rows():
+    day = date(2024, 1, 1)
+
+    rollup_rows = daily_rollup_rows([
+        (2, day, 1, 100),
+        (1, day, 2, 200),
+        (2, day, 1, 300),
+    ])
+
+    assert rollup_rows == [(1, day, 2, 1, 200), (2, day, 1, 2, 400)]
 
 
-@pytest.mark.usefixtures('reset_db')
 @pytest.mark.asyncio
-async def test_get_transaction_report_exists_in_cache(db_helper, redis_mock):
-    cashed_transactions = [
-        TransactionOutSchema(
-            user_id=1,
-            amount=100,
-            transaction_type_id=1,
-            date=datetime.now(),
-        ),
-        TransactionOutSchema(
-            user_id=1,
-            amount=300,
-            transaction_type_id=2,
-            date=datetime.now(),
-        ),
+@pytest.mark.usefixtures('reset_db')
+async def test_daily_totals_updated_on_create(user, db_helper, redis_mock):
+    batch = [
+        TransactionSchema(
+            user_id=user.id,
+            amount=amount,
+            transaction_type=TransactionTypeSchema.DEPOSIT,
+        )
+        for amount in (100, 200)
     ]
 
-    redis_mock.get_report_transaction = Mock(
-        return_value=json_nested_dump(cashed_transactions),
-    )
-
     async with db_helper.session_factory() as session:
-        user_transactions = await get_transactions_view(
-            TransactionReportSchema(
-                user_id=1,
-                date_start=datetime(2024, 1, 1),
-                date_end=datetime(2124, 1, 1),
+        await create_transactions_batch_view(batch, session, redis_mock)
+        await create_transaction_view(batch[0], session, redis_mock)
+        daily_totals = await get_daily_totals_view(
+            TransactionAggregateReportSchema(
+                user_id=user.id,
+                date_start=date(2024, 1, 1),
+                date_end=date(2124, 1, 1),
             ),
             session,
-            redis_mock,
         )
 
-    restored_transactions = [
-        TransactionOutSchema.model_validate(t) for t in user_transactions
-    ]
-    assert restored_transactions == cashed_transactions
+    assert len(daily_totals) == 1
+    assert daily_totals[0].day == date.today()
+    assert daily_totals[0].count == 3
+    assert daily_totals[0].amount == 400
 
 
+@pytest.mark.asyncio
 @pytest.mark.usefixtures('reset_db')
+async def test_balance_updated_by_batch(user, db_helper, redis_mock):
+    batch = [
+        TransactionSchema(
+            user_id=user.id,
+            amount=amount,
+            transaction_type=transaction_type,
+        )
+        for amount, transaction_type in (
+            (500, TransactionTypeSchema.DEPOSIT),
+            (200, TransactionTypeSchema.WITHDRAWAL),
+            (100, TransactionTypeSchema.DEPOSIT),
+        )
+    ]
+
+    async with db_helper.session_factory() as session:
+        await create_transactions_batch_view(batch, session, redis_mock)
+        balance = await get_user_balance_view(user.id, session)
+
+    assert balance.balance == 400
+
+
 @pytest.mark.asyncio
-async def test_get_transaction_report(
-    user_and_transactions, db_helper, redis_mock,
+@pytest.mark.usefixtures('reset_db')
+async def test_create_transaction_redis_down(
+    user, db_helper, redis_mock,
 ):
-    user, transactions_out = user_and_transactions
+    redis_mock.incr_report_version = AsyncMock(side_effect=ConnectionError)
 
     async with db_helper.session_factory() as session:
-        await get_transactions_view(
-            TransactionReportSchema(
+        await create_transaction_view(
+            TransactionSchema(
                 user_id=user.id,
-                date_start=datetime(2024, 1, 1),
-                date_end=datetime(2124, 1, 1),
+                amount=100,
+                transaction_type=TransactionTypeSchema.DEPOSIT,
             ),
             session,
             redis_mock,
         )
+        transactions = await get_user_transactions(user.id, session)
 
-        reports = await get_user_reports(user.id, session)
-        report_transactions = await get_report_transactions(user.id, session)
-
-    assert len(redis_mock.get_cash()) == 1
-    assert len(reports) == 1
-    report = reports[0]
-
-    assert report.date_start == datetime(2024, 1, 1)
-    assert report.date_end == datetime(2124, 1, 1)
-    assert len(report_transactions) == len(transactions_out)
+    assert len(transactions) == 1
+    assert redis_mock.get_cash()
 
 
 @pytest.mark.asyncio
 @pytest.mark.usefixtures('reset_db')
-async def test_get_transaction_wrong_user(db_helper, redis_mock):
+async def test_create_transaction_unknown_user(db_helper, redis_mock):
     async with db_helper.session_factory() as session:
-        with pytest.raises(sqlalchemy.exc.IntegrityError):
-            await get_transactions_view(
-                TransactionReportSchema(
+        with pytest.raises(HTTPException) as ex:
+            await create_transaction_view(
+                TransactionSchema(
                     user_id=1000,
-                    date_start=datetime(2024, 1, 1),
-                    date_end=datetime(2124, 1, 1),
+                    amount=100,
+                    transaction_type=TransactionTypeSchema.DEPOSIT,
                 ),
                 session,
                 redis_mock,
             )
+        transactions = await get_user_transactions(1000, session)
+
+    assert ex.value.status_code == status.HTTP_404_NOT_FOUND
+    assert not transactions
 
 
 @pytest.mark.asyncio
-@pytest.mark.parametrize(
-    'user_id, date_start, date_end, concated',
-    [
-        pytest.param(
-            1,
-            datetime(2024, 1, 1),
-            datetime(2124, 1, 1),
-            '1_2024-01-01T00:00:00_2124-01-01T00:00:00',
-            id='big_range',
-        ),
-        pytest.param(
-            2,
-            datetime(2024, 1, 1),
-            datetime(2024, 1, 1),
-            '2_2024-01-01T00:00:00_2024-01-01T00:00:00',
-            id='small_range',
-        ),
-    ],
-)
-async def test_get_report_key(user_id, date_start, date_end, concated):
-    assert get_report_key(user_id, date_start, date_end) == concated
+@pytest.mark.usefixtures('reset_db')
+async def test_create_transactions_batch_empty(db_helper, redis_mock):
+    async with db_helper.session_factory() as session:
+        transaction_ids = await create_transactions_batch_view(
+            [], session, redis_mock,
+        )
+
+    assert not transaction_ids